@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Build-once cache of the simspec generated aremc register database
+
+Description:
+Executing the generated aremc file rebuilds every register, packet and field dict
+on each launch. This module snapshots the spec tables (registers, packets, defines
+and addr_spaces) together with the overlays a config module adds on top of them,
+and reloads the snapshot while the hashes of the source files are unchanged.
+A changed simspec output or config file silently rebuilds the snapshot.
+
+Each register and packet is stored as its own marshalled blob behind an index of
+byte offsets, so loading the cache only reads the index and a register's field
+dict is materialized the first time it is looked up.
+"""
+import hashlib
+import importlib
+import importlib.util
+import marshal
+import os
+import struct
+import sys
+import threading
+from collections.abc import MutableMapping
+
+# Bumped whenever the layout of the cache file changes
+CACHE_VERSION = 2
+MAGIC = b"AREMC" + bytes((CACHE_VERSION,))
+CACHE_DIRECTORY = "__pycache__"
+SPEC_TABLES = ("registers", "packets", "defines", "addr_spaces")
+# Length of the marshalled index that follows the header
+INDEX_LENGTH = struct.Struct("<Q")
+
+
+class Lazy_Table(MutableMapping):
+    ''' Dict of register or packet entries which are unmarshalled on first access
+
+        self._buffer:   contents of the cache file the entries are stored in
+        self._index:    dict with entry name as key, and tuple of offset and length
+                        of its marshalled blob in buffer as value
+        self._loaded:   dict of entries already materialized or assigned
+    '''
+    def __init__(self, buffer, index):
+        self._buffer = buffer
+        self._index = index
+        self._loaded = dict()
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            entry = self.unmarshal(name)
+            self._loaded[name] = entry
+            return entry
+
+    def __setitem__(self, name, entry):
+        self._loaded[name] = entry
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self._index.pop(name, None)
+        self._loaded.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._loaded or name in self._index
+
+    def __iter__(self):
+        yield from self._index
+        for name in list(self._loaded):
+            if name not in self._index:
+                yield name
+
+    def __len__(self):
+        return len(self._index) + sum(1 for name in self._loaded if name not in self._index)
+
+    def unmarshal(self, name):
+        ''' Returns entry without keeping it materialized, for callers that convert it
+        '''
+        try:
+            return self._loaded[name]
+        except KeyError:
+            offset, length = self._index[name]
+            return marshal.loads(self._buffer[offset:offset + length])
+
+    def loaded(self):
+        ''' Returns number of entries materialized so far
+        '''
+        return len(self._loaded)
+
+
+def load_spec(module_name, overlay=None, sources=()):
+    ''' Returns dict with the spec tables of an aremc module, from cache when valid
+        The dict also holds the cache key under 'version' when the sources could be hashed
+        Parameters:
+            module_name:    name of the generated aremc module (e.g. aremcT234_m)
+            overlay:        function called with the spec dict to add registers
+                            missing from the aremc file before it is cached
+            sources:        additional files the overlay depends on, used in cache key
+    '''
+    try:
+        source = importlib.util.find_spec(module_name).origin
+        key = source_key([source] + list(sources))
+    except (AttributeError, TypeError, OSError):
+        # frozen or missing source, nothing to key the cache on
+        return build_spec(module_name, overlay)
+    cache_path = cache_file(source)
+    spec = read_cache(cache_path, key)
+    if spec is None:
+        spec = build_spec(module_name, overlay)
+        write_cache(cache_path, key, spec)
+    # identifies the spec for caches of data derived from it
+    spec['version'] = key.hex()
+    return spec
+
+
+def build_spec(module_name, overlay=None):
+    ''' Executes the aremc module and returns its spec tables with overlay applied
+    '''
+    module = importlib.import_module(module_name)
+    spec = {table: getattr(module, table) for table in SPEC_TABLES}
+    if overlay is not None:
+        overlay(spec)
+    return spec
+
+
+def source_key(paths):
+    ''' Returns digest of the contents of the source files and the interpreter's marshal format
+    '''
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version_info[0]}.{sys.version_info[1]}:{marshal.version}".encode())
+    for path in paths:
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.digest()
+
+
+def cache_file(source):
+    ''' Returns the path of the cache file kept beside the aremc source
+    '''
+    directory, name = os.path.split(source)
+    return os.path.join(directory, CACHE_DIRECTORY, name.rsplit(".", 1)[0] + ".spec")
+
+
+def read_cache(cache_path, key):
+    ''' Returns cached spec tables, or None if the cache is missing, stale, or unreadable
+        Registers of each address space and packets are returned as Lazy_Table
+    '''
+    try:
+        with open(cache_path, 'rb') as cache:
+            contents = cache.read()
+    except OSError:
+        return None
+    header = MAGIC + key
+    if not contents.startswith(header):
+        return None
+    buffer = memoryview(contents)
+    start = len(header) + INDEX_LENGTH.size
+    try:
+        (length,) = INDEX_LENGTH.unpack_from(buffer, len(header))
+        index = marshal.loads(buffer[start:start + length])
+    except (EOFError, ValueError, TypeError, struct.error):
+        return None
+    blobs = buffer[start + length:]
+    spec = dict(index['tables'])
+    spec['registers'] = {space: Lazy_Table(blobs, entries) for space, entries in index['registers'].items()}
+    spec['packets'] = Lazy_Table(blobs, index['packets'])
+    return spec
+
+
+def write_cache(cache_path, key, spec):
+    ''' Writes spec tables to cache, skipped silently if the location is read-only
+    '''
+    blobs = list()
+    offset = 0
+
+    def add_entries(table):
+        nonlocal offset
+        entries = dict()
+        for name, entry in table.items():
+            blob = marshal.dumps(entry)
+            entries[name] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+        return entries
+
+    try:
+        index = {
+            'registers': {space: add_entries(table) for space, table in spec['registers'].items()},
+            'packets': add_entries(spec['packets']),
+            'tables': {table: spec[table] for table in SPEC_TABLES if table not in ('registers', 'packets')},
+        }
+        index = marshal.dumps(index)
+    except ValueError:
+        return
+    directory = os.path.dirname(cache_path)
+    temporary = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # created with the permissions of a file made by open(), the umask applied by the kernel,
+        # so other users of a shared cache can read it instead of rebuilding it
+        cache = os.fdopen(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o666), 'wb')
+    except OSError:
+        return
+    try:
+        with cache:
+            cache.write(MAGIC + key)
+            cache.write(INDEX_LENGTH.pack(len(index)))
+            cache.write(index)
+            cache.writelines(blobs)
+        os.replace(temporary, cache_path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
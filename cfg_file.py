@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Indexed model of a cfg file
+
+Description:
+Parses a cfg file once into its header comments, the frequency of its parameter file
+line, and an index of every parameter by name with the line it is on and the position
+of its value in that line. Mode register writes, the EmcMrw* and EmcWarmBootMrwExtra
+parameters and the "#@ EMC_MRW" comments, have their mode register address (MA) and
+opcode (OP) decoded from the value.
+
+Values are changed through set_value, which only rebuilds the line of the parameter,
+and write emits the original lines unchanged except for the edited ones.
+"""
+import re
+import output_file
+
+# Line setting a parameter, and comment recording a mode register write, with groups of
+# name and value
+PARAMETER_LINE = re.compile(r"SDRAM\[\d+\]\.(\w+)\s*=\s*([^;\s]+)")
+MRW_COMMENT = re.compile(r"#@\s*(EMC_MRW\w*)[^=]*=\s*([^;\s]+)")
+# Parameters whose value is a mode register write
+MRW_PARAMETERS = ("EmcMrw", "EmcWarmBootMrwExtra")
+
+
+class Cfg_Parameter:
+    ''' Single value set by a cfg file
+
+        self.name:      parameter name, e.g. EmcPmacroIbVrefDq_0, or EMC_MRW name of a comment
+        self.number:    index of line in Cfg_File.lines
+        self.start:     position of start of value in line
+        self.end:       position of end of value in line
+        self.value:     value as int
+        self.address:   mode register address (MA) if a mode register write, otherwise None
+        self.opcode:    mode register opcode (OP) if a mode register write, otherwise None
+    '''
+    __slots__ = ('name', 'number', 'start', 'end', 'value', 'address', 'opcode')
+
+    def __init__(self, name, number, start, end, value, mrw = False):
+        self.name = name
+        self.number = number
+        self.start = start
+        self.end = end
+        self.value = value
+        self.address = (value >> 16) & 0xff if mrw else None
+        self.opcode = value & 0xff if mrw else None
+
+
+class Cfg_File:
+    ''' Lines of a cfg file indexed by parameter name
+
+        self.path:          path to cfg file
+        self.header:        list of the comment lines up to the parameter file line
+        self.frequency:     frequency of the parameter file line, None if not found
+        self.lines:         list of the lines after the header
+        self.parameters:    dict with parameter name as key, and list of Cfg_Parameter in file order
+        self.edited:        dict with index of edited line as key, and new line as value
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rt') as in_file:
+            self.frequency, self.header = read_header(in_file)
+            self.lines = in_file.readlines()
+        self.parameters = dict()
+        self.edited = dict()
+        for number, line in enumerate(self.lines):
+            match = PARAMETER_LINE.match(line)
+            if match is not None:
+                mrw = match.group(1).startswith(MRW_PARAMETERS)
+            else:
+                match = MRW_COMMENT.match(line)
+                mrw = True
+                if match is None:
+                    continue
+            try:
+                # values are hexadecimal with or without 0x prefix, as exported before
+                value = int(match.group(2), 16)
+            except ValueError:
+                continue
+            self.parameters.setdefault(match.group(1), list()).append(
+                Cfg_Parameter(match.group(1), number, match.start(2), match.end(2), value, mrw))
+
+    def set_value(self, parameter, value):
+        ''' Changes the value of a parameter, rewriting only its line
+        '''
+        if value == parameter.value:
+            return
+        parameter.value = value
+        if parameter.address is not None:
+            parameter.address = (value >> 16) & 0xff
+            parameter.opcode = value & 0xff
+        line = self.edited.get(parameter.number, self.lines[parameter.number])
+        text = f"{value:#0{10}x}"
+        self.edited[parameter.number] = line[:parameter.start] + text + line[parameter.end:]
+        parameter.end = parameter.start + len(text)
+
+    def write(self, path, store = None):
+        ''' Writes the cfg file with its edited lines to path, through store if not None
+        '''
+        with output_file.Output_File(path, 'wt', store) as out_file:
+            out_file.writelines(self.header)
+            position = 0
+            for number in sorted(self.edited):
+                out_file.writelines(self.lines[position:number])
+                out_file.write(self.edited[number])
+                position = number + 1
+            out_file.writelines(self.lines[position:])
+
+
+def read_header(in_file):
+    ''' Returns tuple of frequency of cfg and list of the comment lines read, reading the
+        comments at the start of cfg up to the parameter file line, frequency is None if the
+        parameter file line is not found
+    '''
+    header = list()
+    for comment in in_file:
+        # checks for cfg frequency
+        header.append(comment)
+        if comment.startswith("# "):
+            match = re.match(r"# Parameter file: .+\(([\d,.]+) MHz\)", comment)
+            if match:
+                return str(int(float(match.group(1)) * 1000)), header
+        else:
+            break
+    return None, header
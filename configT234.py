@@ -10,8 +10,10 @@ for DVFS (Dynamic Voltage and Frequency Scaling) table management. It includes
 axes for GUI display, registers to be displayed, and additional configurations.
 """
 
-# Import the registers dictionary from accompanying aremc file
-from aremcT234_m import registers
+# Loads the registers dictionary of accompanying aremc file through its build-once cache
+import aremc_cache
+import register_spec
+import register_matcher
 # Import training-specific register configurations
 
 # Tuple of all axes to display in GUI axes selection
@@ -63,6 +65,9 @@ registers_to_display = [
     (r"EMC_SAVE_RESTORE_MOD_OB_C(\d)S(\d)_VREF_OFF",                        r"SAVE_RESTORE_MOD_OB_C\1S\2_VREF_OFF",             "",                             "DQVREF (training)", False)    
 ]
 
+# Single-pass matcher of DVFS register names against registers_to_display
+display_matcher = register_matcher.Register_Matcher(registers_to_display)
+
 """
 Dictionary used to select particular fields to display
 key: Axis where not all fields need to be displayed
@@ -90,229 +95,242 @@ channel_select = {
 }
 
 
-# Training registers are not in aremc file, so added below
-EMC_SAVE_RESTORE_MOD_IB = []
-EMC_SAVE_RESTORE_MOD_OB = []
+def _add_training_registers(spec):
+    ''' Adds the registers missing from the aremc file, applied before the spec is cached
+    '''
+    registers = spec['registers']
+
+    # Training registers are not in aremc file, so added below
+    EMC_SAVE_RESTORE_MOD_IB = []
+    EMC_SAVE_RESTORE_MOD_OB = []
+
+    for byte in range(0,8):
+        register = "SAVE_RESTORE_MOD_IB_BYTE" + str(byte) + "_VREF_OFF"
+        EMC_SAVE_RESTORE_MOD_IB.append(register)
+        C = byte // 2
+        S = byte % 2
+        register = "SAVE_RESTORE_MOD_OB_C" + str(C) + "S" + str(S) + "_VREF_OFF"
+        EMC_SAVE_RESTORE_MOD_OB.append(register)
 
-for byte in range(0,8):
-    register = "SAVE_RESTORE_MOD_IB_BYTE" + str(byte) + "_VREF_OFF"
-    EMC_SAVE_RESTORE_MOD_IB.append(register)
-    C = byte // 2
-    S = byte % 2
-    register = "SAVE_RESTORE_MOD_OB_C" + str(C) + "S" + str(S) + "_VREF_OFF"
-    EMC_SAVE_RESTORE_MOD_OB.append(register)
+    # Registers EMC_SAVE_RESTORE_MOD_IB_
+    if 'EMC' not in registers:
+        registers['EMC'] = {}
+        registers['EMC']['register_list']  = []
 
-# Registers EMC_SAVE_RESTORE_MOD_IB_
-if 'EMC' not in registers:
-    registers['EMC'] = {}
-    registers['EMC']['register_list']  = []
+    for register in EMC_SAVE_RESTORE_MOD_IB:
+        registers['EMC'][register] = {
+            'addr'            : 0x0,
+            'secure'          : 0x0,
+            'word_count'      : 0x1,
+            'size'            : 0x8,
+            'reset_val'       : 0x0,
+            'array'           : False,
+            'reset_mask'      : 0x8000007f,
+            'sw_default_val'  : 0x0,
+            'sw_default_mask' : 0xcfffffff,
+            'read_mask'       : 0xcfffffff,
+            'write_mask'      : 0xcfffffff,
+            '(signed bit)' : {
+                'lsb'        : 31,
+                'msb'        : 31,
+                'size'       : 1,
+                'field'      : (0x1 << 31),
+                'woffset'    : 0x0,
+                'default'    : 0x0,
+                'sw_default' : 0x0,
+                'action'     : 'rw',
+                'enums' : {
+                },
+            },
+            register : {
+                'lsb'        : 0,
+                'msb'        : 6,
+                'size'       : 7,
+                'field'      : (0x7f << 0),
+                'woffset'    : 0x0,
+                'default'    : 0x0,
+                'sw_default' : 0x0,
+                'action'     : 'rw',
+                'enums' : {
+                },
+            },
+            # Fields sorted in order of declaration in register
+            'field_list' : [
+                '(signed bit)',
+                register
+            ],
+        } # End of registers: EMC_SAVE_RESTORE_MOD_IB_
+
+        registers['EMC']['register_list'].append(register)
+
+    # Registers EMC_SAVE_RESTORE_MOD_OB_
+    for register in EMC_SAVE_RESTORE_MOD_OB:
+        registers['EMC'][register] = {
+            'addr'            : 0x0,
+            'secure'          : 0x0,
+            'word_count'      : 0x1,
+            'size'            : 0x8,
+            'reset_val'       : 0x0,
+            'array'           : False,
+            'reset_mask'      : 0x800000ff,
+            'sw_default_val'  : 0x0,
+            'sw_default_mask' : 0x800000ff,
+            'read_mask'       : 0x800000ff,
+            'write_mask'      : 0x800000ff,
+            '(signed bit)' : {
+                'lsb'        : 31,
+                'msb'        : 31,
+                'size'       : 1,
+                'field'      : (0x1 << 31),
+                'woffset'    : 0x0,
+                'default'    : 0x0,
+                'sw_default' : 0x0,
+                'action'     : 'rw',
+                'enums' : {
+                },
+            },
+            register : {
+                'lsb'        : 0,
+                'msb'        : 7,
+                'size'       : 8,
+                'field'      : (0xff << 0),
+                'woffset'    : 0x0,
+                'default'    : 0x0,
+                'sw_default' : 0x0,
+                'action'     : 'rw',
+                'enums' : {
+                },
+            },
+            # Fields sorted in order of declaration in register
+            'field_list' : [
+                '(signed bit)',
+                register
+            ],
+        } # End of registers: EMC_SAVE_RESTORE_MOD_OB_
 
-for register in EMC_SAVE_RESTORE_MOD_IB:
-    registers['EMC'][register] = {
-        'addr'            : 0x0,
+        registers['EMC']['register_list'].append(register)
+        ## print(EMC_SAVE_RESTORE_MOD_OB)    
+
+    # CMDVREF register is not in aremc. just added - Gil Jung
+
+    # R0_DRAM_MR12
+    if 'R0' not in registers:
+        registers['R0'] = {}
+        registers['R0']['register_list']  = []
+
+    registers['R0']['DRAM_MR12'] = {
+        'addr'            : 0x00,
         'secure'          : 0x0,
         'word_count'      : 0x1,
-        'size'            : 0x8,
+        'size'            : 0x20,
         'reset_val'       : 0x0,
         'array'           : False,
-        'reset_mask'      : 0x8000007f,
+        'reset_mask'      : 0x000000ff,
         'sw_default_val'  : 0x0,
-        'sw_default_mask' : 0xcfffffff,
-        'read_mask'       : 0xcfffffff,
-        'write_mask'      : 0xcfffffff,
-        '(signed bit)' : {
-            'lsb'        : 31,
-            'msb'        : 31,
-            'size'       : 1,
-            'field'      : (0x1 << 31),
-            'woffset'    : 0x0,
-            'default'    : 0x0,
-            'sw_default' : 0x0,
-            'action'     : 'rw',
-            'enums' : {
-            },
-        },
-        register : {
-            'lsb'        : 0,
-            'msb'        : 6,
-            'size'       : 7,
-            'field'      : (0x7f << 0),
-            'woffset'    : 0x0,
-            'default'    : 0x0,
-            'sw_default' : 0x0,
-            'action'     : 'rw',
+        'sw_default_mask' : 0x000000ff,
+        'read_mask'       : 0x000000ff,
+        'write_mask'      : 0x000000ff,
+        'CMDVREF_MR12' : {
+            'lsb'               : 0,
+            'msb'               : 7,
+            'size'              : 8,
+            'field'             : (0xff << 0),
+            'woffset'           : 0x0,
+            'default'           : 0x0,
+            'sw_default'        : 0x0,
+            'parity_protection' : 1,
+            'action'            : 'rw',
             'enums' : {
             },
-        },
+        },    
         # Fields sorted in order of declaration in register
         'field_list' : [
-            '(signed bit)',
-            register
+            'CMDVREF_MR12',
         ],
-    } # End of registers: EMC_SAVE_RESTORE_MOD_IB_
-            
-    registers['EMC']['register_list'].append(register)
-            
-# Registers EMC_SAVE_RESTORE_MOD_OB_
-for register in EMC_SAVE_RESTORE_MOD_OB:
-    registers['EMC'][register] = {
-        'addr'            : 0x0,
+    } # End of register: R0_DRAM_MR12
+
+    registers['R0']['register_list'].append('DRAM_MR12')
+
+    # R0_DRAM_MR14
+    if 'R0' not in registers:
+        registers['R0'] = {}
+        registers['R0']['register_list']  = []
+
+    registers['R0']['DRAM_MR14'] = {
+        'addr'            : 0x00,
         'secure'          : 0x0,
         'word_count'      : 0x1,
-        'size'            : 0x8,
+        'size'            : 0x20,
         'reset_val'       : 0x0,
         'array'           : False,
-        'reset_mask'      : 0x800000ff,
+        'reset_mask'      : 0x000000ff,
         'sw_default_val'  : 0x0,
-        'sw_default_mask' : 0x800000ff,
-        'read_mask'       : 0x800000ff,
-        'write_mask'      : 0x800000ff,
-        '(signed bit)' : {
-            'lsb'        : 31,
-            'msb'        : 31,
-            'size'       : 1,
-            'field'      : (0x1 << 31),
-            'woffset'    : 0x0,
-            'default'    : 0x0,
-            'sw_default' : 0x0,
-            'action'     : 'rw',
+        'sw_default_mask' : 0x000000ff,
+        'read_mask'       : 0x000000ff,
+        'write_mask'      : 0x000000ff,
+        'DQVREF_MR14' : {
+            'lsb'               : 0,
+            'msb'               : 7,
+            'size'              : 8,
+            'field'             : (0xff << 0),
+            'woffset'           : 0x0,
+            'default'           : 0x0,
+            'sw_default'        : 0x0,
+            'parity_protection' : 1,
+            'action'            : 'rw',
             'enums' : {
             },
-        },
-        register : {
-            'lsb'        : 0,
-            'msb'        : 7,
-            'size'       : 8,
-            'field'      : (0xff << 0),
-            'woffset'    : 0x0,
-            'default'    : 0x0,
-            'sw_default' : 0x0,
-            'action'     : 'rw',
-            'enums' : {
-            },
-        },
+        },    
         # Fields sorted in order of declaration in register
         'field_list' : [
-            '(signed bit)',
-            register
+            'DQVREF_MR14',
         ],
-    } # End of registers: EMC_SAVE_RESTORE_MOD_OB_
-
-    registers['EMC']['register_list'].append(register)
-    ## print(EMC_SAVE_RESTORE_MOD_OB)    
-
-# CMDVREF register is not in aremc. just added - Gil Jung
-
-# R0_DRAM_MR12
-if 'R0' not in registers:
-    registers['R0'] = {}
-    registers['R0']['register_list']  = []
+    } # End of register: R0_DRAM_MR14
 
-registers['R0']['DRAM_MR12'] = {
-    'addr'            : 0x00,
-    'secure'          : 0x0,
-    'word_count'      : 0x1,
-    'size'            : 0x20,
-    'reset_val'       : 0x0,
-    'array'           : False,
-    'reset_mask'      : 0x000000ff,
-    'sw_default_val'  : 0x0,
-    'sw_default_mask' : 0x000000ff,
-    'read_mask'       : 0x000000ff,
-    'write_mask'      : 0x000000ff,
-    'CMDVREF_MR12' : {
-        'lsb'               : 0,
-        'msb'               : 7,
-        'size'              : 8,
-        'field'             : (0xff << 0),
-        'woffset'           : 0x0,
-        'default'           : 0x0,
-        'sw_default'        : 0x0,
-        'parity_protection' : 1,
-        'action'            : 'rw',
-        'enums' : {
-        },
-    },    
-    # Fields sorted in order of declaration in register
-    'field_list' : [
-        'CMDVREF_MR12',
-    ],
-} # End of register: R0_DRAM_MR12
+    registers['R0']['register_list'].append('DRAM_MR14')
 
-registers['R0']['register_list'].append('DRAM_MR12')
+    # R0_DRAM_MR15
+    if 'R0' not in registers:
+        registers['R0'] = {}
+        registers['R0']['register_list']  = []
 
-# R0_DRAM_MR14
-if 'R0' not in registers:
-    registers['R0'] = {}
-    registers['R0']['register_list']  = []
-
-registers['R0']['DRAM_MR14'] = {
-    'addr'            : 0x00,
-    'secure'          : 0x0,
-    'word_count'      : 0x1,
-    'size'            : 0x20,
-    'reset_val'       : 0x0,
-    'array'           : False,
-    'reset_mask'      : 0x000000ff,
-    'sw_default_val'  : 0x0,
-    'sw_default_mask' : 0x000000ff,
-    'read_mask'       : 0x000000ff,
-    'write_mask'      : 0x000000ff,
-    'DQVREF_MR14' : {
-        'lsb'               : 0,
-        'msb'               : 7,
-        'size'              : 8,
-        'field'             : (0xff << 0),
-        'woffset'           : 0x0,
-        'default'           : 0x0,
-        'sw_default'        : 0x0,
-        'parity_protection' : 1,
-        'action'            : 'rw',
-        'enums' : {
-        },
-    },    
-    # Fields sorted in order of declaration in register
-    'field_list' : [
-        'DQVREF_MR14',
-    ],
-} # End of register: R0_DRAM_MR14
-
-registers['R0']['register_list'].append('DRAM_MR14')
+    registers['R0']['DRAM_MR15'] = {
+        'addr'            : 0x00,
+        'secure'          : 0x0,
+        'word_count'      : 0x1,
+        'size'            : 0x20,
+        'reset_val'       : 0x0,
+        'array'           : False,
+        'reset_mask'      : 0x000000ff,
+        'sw_default_val'  : 0x0,
+        'sw_default_mask' : 0x000000ff,
+        'read_mask'       : 0x000000ff,
+        'write_mask'      : 0x000000ff,
+        'DQVREF_MR15' : {
+            'lsb'               : 0,
+            'msb'               : 7,
+            'size'              : 8,
+            'field'             : (0xff << 0),
+            'woffset'           : 0x0,
+            'default'           : 0x0,
+            'sw_default'        : 0x0,
+            'parity_protection' : 1,
+            'action'            : 'rw',
+            'enums' : {
+            },
+        },    
+        # Fields sorted in order of declaration in register
+        'field_list' : [
+            'DQVREF_MR15',
+        ],
+    } # End of register: R0_DRAM_MR14
 
-# R0_DRAM_MR15
-if 'R0' not in registers:
-    registers['R0'] = {}
-    registers['R0']['register_list']  = []
+    registers['R0']['register_list'].append('DRAM_MR15')
 
-registers['R0']['DRAM_MR15'] = {
-    'addr'            : 0x00,
-    'secure'          : 0x0,
-    'word_count'      : 0x1,
-    'size'            : 0x20,
-    'reset_val'       : 0x0,
-    'array'           : False,
-    'reset_mask'      : 0x000000ff,
-    'sw_default_val'  : 0x0,
-    'sw_default_mask' : 0x000000ff,
-    'read_mask'       : 0x000000ff,
-    'write_mask'      : 0x000000ff,
-    'DQVREF_MR15' : {
-        'lsb'               : 0,
-        'msb'               : 7,
-        'size'              : 8,
-        'field'             : (0xff << 0),
-        'woffset'           : 0x0,
-        'default'           : 0x0,
-        'sw_default'        : 0x0,
-        'parity_protection' : 1,
-        'action'            : 'rw',
-        'enums' : {
-        },
-    },    
-    # Fields sorted in order of declaration in register
-    'field_list' : [
-        'DQVREF_MR15',
-    ],
-} # End of register: R0_DRAM_MR14
 
-registers['R0']['register_list'].append('DRAM_MR15')
\ No newline at end of file
+_spec = aremc_cache.load_spec('aremcT234_m', _add_training_registers, [__file__])
+registers = _spec['registers']
+# Changes whenever the aremc file or this config changes, used to key cached table partitions
+config_version = _spec.get('version')
+# Slotted field metadata of registers, built on first lookup
+register_specs = register_spec.Spec_Catalog(registers)
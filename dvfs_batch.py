@@ -0,0 +1,99 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line batch mode of the DVFS table editor
+
+Description:
+Applies a recipe (see dvfs_recipe) to a DVFS table and exports it, generates a sweep
+(see dvfs_sweep), writes the changes as a variant (see dvfs_variant), or materializes
+the full table of a variant, without the GUI.
+Does not import tkinter, so it runs on hosts without Tk or a display, dvfs_edit_Orin
+runs it when given command line arguments.
+
+Usage:
+    python dvfs_batch.py recipe.json --table table.txt --output out
+    python dvfs_batch.py --materialize margin.dvfsvar table_margin.txt
+"""
+import sys
+import dvfs_table
+import dvfs_recipe
+import dvfs_variant
+
+
+def batch(arguments = None):
+    ''' Applies a recipe of axis offsets to a DVFS table and exports the DVFS, derated, and cfg
+        files without the GUI, or generates every variant of a sweep recipe, options given on
+        the command line override the recipe, or writes the full DVFS table of a variant
+        Returns exit status
+    '''
+    import argparse
+    parser = argparse.ArgumentParser(description = "Apply an axis offset recipe to a DVFS table")
+    parser.add_argument("recipe", nargs = "?", help = "JSON or YAML recipe of axis and field changes")
+    parser.add_argument("--table", help = "DVFS table text file")
+    parser.add_argument("--derated", help = "derated table text file")
+    parser.add_argument("--cfg", help = "cfg file, or directory of cfg files of any frequencies")
+    parser.add_argument("--output", help = "output directory, beside the inputs if omitted")
+    parser.add_argument("--addendum", help = "string appended to output file names")
+    parser.add_argument("--overwrite", action = "store_true", default = None, help = "write over the input files")
+    parser.add_argument("--workers", type = int, help = "processes to load all frequencies or generate sweep variants with")
+    parser.add_argument("--variant", help = "write the changes as a delta variant of the table to this file instead of exporting")
+    parser.add_argument("--materialize", nargs = 2, metavar = ("VARIANT", "OUTPUT"),
+                        help = "write the full DVFS table of a variant to OUTPUT, no recipe needed")
+    options = parser.parse_args(arguments)
+    if options.materialize:
+        return materialize(*options.materialize)
+    if options.recipe is None:
+        parser.error("the following arguments are required: recipe")
+    try:
+        recipe = dvfs_recipe.load_recipe(options.recipe)
+        for key in ("table", "derated", "cfg", "output", "addendum", "overwrite"):
+            if getattr(options, key) is not None:
+                recipe[key] = getattr(options, key)
+        if not recipe.get("table"):
+            raise dvfs_table.Table_Error("No input file selected")
+        if "sweep" in recipe:
+            import dvfs_sweep
+            manifest = dvfs_sweep.sweep(recipe, options.workers)
+            failed = [entry for entry in manifest if "error" in entry]
+            for entry in failed:
+                print(f"ERROR: {entry['offsets']}: {entry['error']}", file = sys.stderr)
+            print(f"Generated {len(manifest) - len(failed):d} of {len(manifest):d} variants")
+            return 1 if failed else 0
+        table = dvfs_table.DVFS_Table()
+        processor = table.parse_file(dvfs_recipe.table_path(recipe["table"]), options.workers)
+        print("Parsed " + processor + " DVFS Table")
+        messages = dvfs_recipe.apply_recipe(table, recipe)
+        if options.variant:
+            deltas = dvfs_variant.save_variant(table, options.variant)
+            for message in messages:
+                print(message)
+            print(f"Wrote {deltas:d} register deltas to {options.variant}")
+            return 0
+        problems = dvfs_recipe.export_recipe(table, recipe)
+    except (dvfs_table.Table_Error, OSError) as exception:
+        print(f"ERROR: {exception}", file = sys.stderr)
+        return 1
+    for message in messages:
+        print(message)
+    for problem in problems:
+        print(f"ERROR: {problem}", file = sys.stderr)
+    if problems:
+        return 1
+    print("Export successful!")
+    return 0
+
+
+def materialize(variantpath, outputpath):
+    ''' Writes the full DVFS table of a variant, returns exit status
+    '''
+    try:
+        dvfs_variant.materialize(variantpath, outputpath)
+    except (dvfs_table.Table_Error, OSError) as exception:
+        print(f"ERROR: {exception}", file = sys.stderr)
+        return 1
+    print(f"Wrote {outputpath}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(batch())
@@ -6,190 +6,237 @@ Created on Tue May 15 18:11:24 2018
 @author: christophers
 """
 #import fileinput
+import os
+import sys
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # batch mode is dispatched before tkinter is imported, so it runs on hosts without Tk
+    import dvfs_batch
+    sys.exit(dvfs_batch.batch())
 from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
-from config import processor_register
-from shutil import copyfile
-import re
-import tempfile
-import importlib
-import os
+import queue
+import threading
+# bundled for PyInstaller, the config of a table's processor is imported on load
 import configT234
-
-class Field_Info:
-    ''' Stores value and information of a single field
-    
-    Parameters:
-        value: integer representation of value for field
-        bits: Number of bits the field is allocated in register value
-        two: Boolean if value is in two's complement or not
-        lsb: Location of lsb in register value
+import dvfs_table
+import dvfs_variant
+
+class Register_Grid:
+    ''' Virtualized view of the fields of the selected axis, a row of a ttk.Treeview per field
+        instead of a set of widgets per field, so only the visible rows are drawn
+
+        Group "-"/"+" buttons change every field by the step of the axis when clicked or
+        activated from the keyboard, and repeat while held down, refreshing the rows once
+        per step, the "-"/"+" keys
+        change the selected fields by one, and double-clicking the Change column of a row
+        edits the change of the field in place.
+
+        Rows are pooled across axis and frequency switches: items are detached instead of
+        deleted when the grid is cleared, and rebound to the Field_Info of the next display
+        by position, so only the cells that differ are rewritten and only rows beyond the
+        largest display so far are created.
+
+        self.group:     Group_Counter of the fields displayed
+        self.fields:    dict with tree item as key, and Field_Info of row as value
+        self.items:     list of pooled tree items in row order
+        self.positions: dict with tree item as key, and its position in self.items as value
+        self.values:    list of values last written to each pooled tree item
+        self.editor:    ttk.Entry placed over the Change cell being edited, otherwise None
     '''
-    def __init__(self, value, bits, two, lsb, counter = None):
-        self.value = value
-        self.bits = bits
-        self.two = two
-        self.lsb = lsb
-        self.counter = counter
-    
-    def set_counter(self, counter):
-        self.remove_counter()
-        self.counter = counter
-        
-    def remove_counter(self):
-        if self.counter is not None:
-            del self.counter
-        self.counter = None
+    columns = ("channel", "register", "field", "value", "change", "total")
+    # milliseconds before a held group button starts repeating, and between repeats
+    repeat_delay = 400
+    repeat_interval = 50
+    headings = ("Channel", "Register", "Field", "Value", "Change", "New value")
+    widths = (100, 400, 300, 90, 70, 90)
 
-class Counter:
-    ''' Creates GUI of counter buttons and stores the new value for corresponding field
-    
-        value:  counter's value
-        total:  new value
-    '''
-    def __init__(self, counter_frame, total_frame, field):
-        self.decrement_button = ttk.Button(counter_frame, text="-", command=self.decrement, width=3)
-        self.decrement_button.grid(row = 0, column = 0)
-        self.increment_button = ttk.Button(counter_frame, text="+", command=self.increment, width=3)
+    def __init__(self, master):
+        self.frame = ttk.Frame(master)
+        self.frame_group = ttk.Frame(self.frame)
+        self.frame_group.pack(side = TOP, anchor = E)
+        ttk.Label(self.frame_group, text = "All:").grid(row = 0, column = 0, padx = (0,5))
+        self.decrement_button = ttk.Button(self.frame_group, text="-", width=3, command = lambda: self.step(-1))
+        self.decrement_button.grid(row = 0, column = 1)
+        self.increment_button = ttk.Button(self.frame_group, text="+", width=3, command = lambda: self.step(1))
         self.increment_button.grid(row = 0, column = 2)
-        self.value = IntVar()
-        self.counter_field = ttk.Entry(counter_frame, width = 3, textvariable = self.value)
-        self.counter_field.grid(row = 0, column = 1)
-        self.counter_field.state(['readonly'])
-        self.total = StringVar()
-        self.total_field = ttk.Entry(total_frame, width = 6, textvariable = self.total)
-        self.total_field.state(['readonly'])
-        self.total_field.grid(row = 0, column = 0)
-        self.total.set(hex(field.value))
-
-    def decrement(self):
-        self.value.set(self.value.get() - 1)
-        self.total.set(hex(int(self.total.get(), 16) - 1))
-
-    def increment(self):
-        self.value.set(self.value.get() + 1)
-        self.total.set(hex(int(self.total.get(), 16) + 1))
-        
-    def get_value(self):
-        return self.value.get()
-    
-    def reset_value(self):
-        self.value.set(0)
-
-    def get_change(self):
-        return int(self.total.get(), 16)
-        
-class Two_Counter(Counter):
-    ''' Similar to Counter class but increment and decrement rules are different
-        due to representation in two's complement
-        
-        self.bits:      Number of bits the field has
-        self.bin_value: binary value of the new number
-                        cannot use self.total because total needs to store the two's complement
-                        form of the new value in binary as a string
-    '''
-    def __init__(self, counter_frame, total_frame, field):
-        super().__init__(counter_frame, total_frame, field)
-        self.bits = field.bits
-        self.bin_value = twos_complement_value(field.value, self.bits)
-                
-    def increment(self):
-        self.bin_value += 1
-        if within_bounds(self.bin_value, self.bits, True):
-            if self.bin_value < 0:
-                self.total.set(hex(twos_complement(self.bin_value, self.bits)))
-            else:
-                self.total.set(hex(self.bin_value))
-        else:
-            self.total.set("N/A")
-        self.value.set(self.value.get() + 1)
-        
-    def decrement(self):
-        self.bin_value -= 1
-        if within_bounds(self.bin_value, self.bits, True):
-            if self.bin_value < 0:
-                self.total.set(hex(twos_complement(self.bin_value, self.bits)))
+        for button, times in ((self.decrement_button, -1), (self.increment_button, 1)):
+            button.bind("<ButtonPress-1>", lambda event, times = times: self.press(times))
+            button.bind("<ButtonRelease-1>", lambda event: self.release())
+        self.tree = ttk.Treeview(self.frame, columns = self.columns, show = 'headings', height = 20)
+        for column, heading, width in zip(self.columns, self.headings, self.widths):
+            self.tree.heading(column, text = heading)
+            self.tree.column(column, width = width, anchor = W if column in ("channel", "register", "field") else CENTER)
+        self.tree.pack(side = LEFT, fill = BOTH, expand = TRUE)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient = VERTICAL, command = self.tree.yview)
+        self.scrollbar.pack(side = RIGHT, fill = Y)
+        self.tree.config(yscrollcommand = self.scrollbar.set)
+        for key in ("<plus>", "<KP_Add>"):
+            self.tree.bind(key, lambda event: self.change_selection(1))
+        for key in ("<minus>", "<KP_Subtract>"):
+            self.tree.bind(key, lambda event: self.change_selection(-1))
+        self.tree.bind("<Double-1>", self.edit)
+        self.group = None
+        self.fields = dict()
+        self.items = list()
+        self.positions = dict()
+        self.values = list()
+        self.editor = None
+        self.repeat = None
+        self.repeated = False
+
+    def grid(self, **options):
+        self.frame.grid(**options)
+
+    def show(self, group, rows):
+        ''' Displays rows of fields
+            Parameters:
+                group:  Group_Counter of the counters of the fields
+                rows:   list of tuples of channel, register, field name, and Field_Info with a counter,
+                        channel and register are empty strings when the same as the previous row
+        '''
+        self.close_editor()
+        self.group = group
+        self.fields.clear()
+        for position, (channel, register, field, field_info) in enumerate(rows):
+            values = (channel, register, field) + self.row_values(field_info)
+            if position < len(self.items):
+                item = self.items[position]
+                if self.values[position] != values:
+                    self.tree.item(item, values = values)
+                    self.values[position] = values
             else:
-                self.total.set(hex(self.bin_value))
-        else:
-            self.total.set("N/A")
-        self.value.set(self.value.get() - 1)
-        
-    def get_change(self):
-        return self.bin_value
-        
+                item = self.tree.insert('', END, values = values)
+                self.positions[item] = len(self.items)
+                self.items.append(item)
+                self.values.append(values)
+            self.fields[item] = field_info
+        self.tree.set_children('', *self.items[:len(rows)])
+
+    def row_values(self, field_info):
+        ''' Returns tuple of value, change, and new value columns of a field
+        '''
+        return (f"{field_info.value:#x}", field_info.counter.get_value(), field_info.counter.get_total())
 
-class Group_Counter:
-    ''' Class that stores a list of Counter objects and can change them all at once
-    '''
-    def __init__(self, master, step_size):
-        self.decrement_button = ttk.Button(master, text="-", command=self.decrement, width=3)
-        self.decrement_button.grid(row = 0, column = 0)
-        self.increment_button = ttk.Button(master, text="+", command=self.increment, width=3)
-        self.increment_button.grid(row = 0, column = 2)
-        self.counters = list()
-        self.step = step_size
-    
-    def add(self, counter):
-        self.counters.append(counter)
-        
-    def decrement(self):
-        for counter in self.counters:
-            for times in range(self.step):
-                counter.decrement()
-
-    def increment(self):
-        for counter in self.counters:
-            for times in range(self.step):
-                counter.increment()
-
-class VREF_Counter(Group_Counter):
-    ''' Special group counter because VREF registers have a sign field
-    '''
-    def __init__(self, master, step):
-        super().__init__(master, step)
-        self.sign = list()
-        self.size = 0
-        
-    def add(self, counter):
-        if (self.size % 2) == 0:
-            self.sign.append(counter)
+    def refresh(self, items = None):
+        ''' Updates the value columns of rows, all rows if items is None
+        '''
+        for item in self.fields if items is None else items:
+            field_info = self.fields[item]
+            if field_info.counter is not None:
+                position = self.positions[item]
+                values = self.values[position][:3] + self.row_values(field_info)
+                if self.values[position] != values:
+                    self.tree.item(item, values = values)
+                    self.values[position] = values
+
+    def change_group(self, times):
+        if self.group is not None:
+            self.group.change(times)
+            self.refresh()
+
+    def step(self, times):
+        ''' Command of a group button, changes the group once unless the press already
+            repeated the change
+        '''
+        if self.repeated:
+            self.repeated = False
         else:
-            self.counters.append(counter)
-        self.size += 1
-        
-    def decrement(self):
-        for sign, counter in zip(self.sign, self.counters):
-            for times in range(self.step):
-                current_sign = sign.get_change()
-                current_total = counter.get_change()
-                if current_sign == 1:
-                    counter.increment()
-                elif current_total == 0:
-                    sign.increment()
-                    counter.increment()
-                else:
-                    counter.decrement()
-
-    def increment(self):
-        for sign, counter in zip(self.sign, self.counters):
-            for times in range(self.step):
-                current_sign = sign.get_change()
-                current_total = counter.get_change()
-                if (current_sign == 1) & (current_total == 1):
-                    sign.decrement()
-                    counter.decrement()
-                elif current_sign == 1:
-                    counter.decrement()
-                else:
-                    counter.increment()
+            self.change_group(times)
+
+    def press(self, times):
+        ''' Starts repeating the change of the group if the button is held down past the delay,
+            the single change of a click is left to the button command
+        '''
+        self.release()
+        self.repeated = False
+        self.repeat = self.frame.after(self.repeat_delay, self.hold, times)
+
+    def hold(self, times):
+        self.repeated = True
+        self.change_group(times)
+        self.repeat = self.frame.after(self.repeat_interval, self.hold, times)
+
+    def release(self):
+        if self.repeat is not None:
+            self.frame.after_cancel(self.repeat)
+            self.repeat = None
+        if self.repeated:
+            # the command runs right after the release when it is over the button, otherwise
+            # the flag is dropped once idle so a later keyboard activation still steps
+            self.frame.after_idle(self.end_repeat)
+
+    def end_repeat(self):
+        self.repeated = False
+
+    def change_selection(self, times):
+        items = [item for item in self.tree.selection() if item in self.fields]
+        for item in items:
+            self.fields[item].counter.change(times)
+        self.refresh(items)
+
+    def edit(self, event):
+        ''' Places an entry over the Change cell double-clicked to type the change of the field
+        '''
+        item = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not item or column != f"#{self.columns.index('change') + 1:d}":
+            return
+        self.close_editor()
+        x, y, width, height = self.tree.bbox(item, column)
+        self.editor = ttk.Entry(self.tree, justify = CENTER)
+        self.editor.insert(0, self.fields[item].counter.get_value())
+        self.editor.select_range(0, END)
+        self.editor.place(x = x, y = y, width = width, height = height)
+        self.editor.focus_set()
+        self.editor.bind("<Return>", lambda event: self.commit(item))
+        self.editor.bind("<KP_Enter>", lambda event: self.commit(item))
+        self.editor.bind("<Escape>", lambda event: self.close_editor())
+        self.editor.bind("<FocusOut>", lambda event: self.close_editor())
+
+    def commit(self, item):
+        try:
+            change = int(self.editor.get(), 0)
+        except ValueError:
+            change = None
+        self.close_editor()
+        if change is not None and item in self.fields:
+            counter = self.fields[item].counter
+            counter.change(change - counter.get_value())
+            self.refresh([item])
+
+    def close_editor(self):
+        if self.editor is not None:
+            editor, self.editor = self.editor, None
+            editor.destroy()
+
+    def clear(self):
+        ''' Detaches the rows, keeping their items in the pool for the next display
+        '''
+        self.release()
+        self.close_editor()
+        self.tree.set_children('')
+        self.fields.clear()
+        self.group = None
+        self.tree.yview_moveto(0)
 
 class GUI:
     ''' Displays the GUI and handles all the actions
+    
+        Exports run on a background thread pool, the writers report their progress through
+        self.export_status which is polled with after() on the Tk thread
     '''
+    # milliseconds between polls of a running export
+    export_poll = 50
+
     def __init__(self, master):
+        self.master = master
         self.data = Data()
+        self.executor = None
+        self.export_writers = None
+        self.export_cancel = None
+        self.export_status = queue.Queue()
+        self.export_files = dict()
         self.inputfilepath = None
         self.inputfile = None
         self.current_axis = None
@@ -210,6 +257,11 @@ class GUI:
         self.load_file = ttk.Button(self.frame_file, text="Load", command=self.load_file, width=10)
         self.load_file.grid(row = 1, column = 2)
         
+        # partitions every frequency up front across worker processes instead of on selection
+        self.parallel = BooleanVar()
+        self.checkbutton_parallel = ttk.Checkbutton(self.frame_file, text = "Parallel load", variable = self.parallel, onvalue = True, offvalue = False)
+        self.checkbutton_parallel.grid(row = 1, column = 3, padx = (10, 0))
+        
         # Other files
         self.frame_additional = ttk.Frame(master)
         self.frame_additional.grid(row = 1, column = 0, padx = (20,20), sticky = W)
@@ -259,18 +311,9 @@ class GUI:
         self.axis_menu.grid(row = 1, column = 0)
         self.axis_menu.configure(state = 'disabled')
         self.axis_menu.bind("<<ComboboxSelected>>", self.axis_selected)
-        # Frame for displayed registers
-        self.canvas_frame = ttk.Frame(master, width = 1000, height = 1000)
-        self.canvas_frame.grid(row = 5, column = 0, sticky = "wens", fill = None)
-        self.canvas_values = Canvas(self.canvas_frame, width = 1000, height = 500)
-        self.canvas_values.pack(side = LEFT, fill = BOTH, expand = TRUE)
-        self.frame_values = ttk.Frame(self.canvas_values)
-        self.canvas_values.create_window(0, 0, window = self.frame_values, anchor = NW)
-        # Scrollbar
-        self.scrollbar = ttk.Scrollbar(self.canvas_frame, orient = VERTICAL, command = self.canvas_values.yview)
-        self.scrollbar.pack(side = RIGHT, fill = Y)
-        self.canvas_values.config(yscrollcommand = self.scrollbar.set)
-        self.frame_values.bind("<Configure>", self.frame_width)
+        # Grid of displayed registers
+        self.register_grid = Register_Grid(master)
+        self.register_grid.grid(row = 5, column = 0, sticky = "wens", padx = (20,20))
         
         # Error box
         self.error = ttk.Entry(master, width = 143)
@@ -310,8 +353,15 @@ class GUI:
         self.export_file = ttk.Button(self.frame_export, text="Export", command=self.export_file, width=10)
         self.export_file.grid(row = 1, column = 2)
         
+        self.progress_export = ttk.Progressbar(self.frame_export, orient = HORIZONTAL, mode = 'determinate')
+        self.progress_export.grid(row = 2, column = 0, sticky = "we", pady = (5,0))
+        self.cancel_export = ttk.Button(self.frame_export, text="Cancel", command=self.cancel_exporting, width=13)
+        self.cancel_export.grid(row = 2, column = 1, pady = (5,0))
+        self.cancel_export.state(['disabled'])
+        
     def browse_file(self):
-        self.inputfilepath = filedialog.askopenfilename(filetypes = (("Text files", "*.txt") , ("All files", "*.*")))
+        self.inputfilepath = filedialog.askopenfilename(filetypes = (("Text files", "*.txt") , ("DVFS variants", "*" + dvfs_variant.EXTENSION),
+                                                                     ("All files", "*.*")))
         self.entry.configure(state = 'normal')
         self.entry.delete(0, END)
         self.entry.insert(0, self.inputfilepath)
@@ -325,11 +375,19 @@ class GUI:
         self.current_frequency = None
         self.current_axis = None
         self.clear_canvas()
-        self.data.parse_file(self.inputfilepath, self.error)
-        self.inputfile = self.inputfilepath
+        workers = os.cpu_count() if self.parallel.get() else None
+        if self.inputfilepath.endswith(dvfs_variant.EXTENSION):
+            if not self.data.parse_variant(self.inputfilepath, self.error, workers):
+                return
+            # edits of the variant are exported against its base table
+            self.inputfile = self.data.table.index.path
+        else:
+            if not self.data.parse_file(self.inputfilepath, self.error, workers):
+                return
+            self.inputfile = self.inputfilepath
         self.bits_menu.set("")
         self.bits_menu.configure(state = 'readonly')
-        self.bits_menu.config(values = [bits for bits in channel_select])
+        self.bits_menu.config(values = self.data.table.bus_widths())
         self.frequency_menu.set("")
         self.frequency_menu.configure(state = 'disabled')
         self.axis_menu.set("")
@@ -373,18 +431,70 @@ class GUI:
                 return
             else:
                 pass
+        if self.export_writers is not None:
+            error_message(self.error, "ERROR: Export in progress")
+            return
         if self.current_frequency and self.current_axis:
             self.save_changes()
             error_message(self.error, "Exporting...")
             self.data.clear(self.current_frequency, self.current_axis)
-            self.data.export(self.inputfile, self.exportpath, self.deratedpath, self.cfgpath, self.entry_addendum.get(), self.error)
-            self.data.display(self.frame_values, self.current_frequency, self.current_axis, self.current_bits, self.error)
+            if self.executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.executor = ThreadPoolExecutor(max_workers = 3)
+            self.export_cancel = threading.Event()
+            self.export_files.clear()
+            try:
+                self.export_writers = self.data.start_export(self.executor, self.inputfile, self.exportpath, self.deratedpath, self.cfgpath,
+                                                             self.entry_addendum.get(), self.export_progress, self.export_cancel)
+            except OSError as exception:
+                error_message(self.error, f"ERROR: {exception}")
+            else:
+                self.progress_export.configure(value = 0)
+                self.cancel_export.state(['!disabled'])
+                self.lock_export(True)
+                self.master.after(self.export_poll, self.poll_export)
+            self.data.display(self.register_grid, self.current_frequency, self.current_axis, self.current_bits, self.error)
         else:
             error_message(self.error, "ERROR: Select frequency/axis before exporting")
+
+    def export_progress(self, name, done, total):
+        ''' Called from the export writer threads, only queues the progress for poll_export
+        '''
+        self.export_status.put((name, done, total))
+
+    def poll_export(self):
+        ''' Updates the progress bar from the queued progress of the writers, and shows the
+            result once every writer is done
+        '''
+        while True:
+            try:
+                name, done, total = self.export_status.get_nowait()
+            except queue.Empty:
+                break
+            self.export_files[name] = (done, total)
+        total = sum(total for done, total in self.export_files.values())
+        if total:
+            self.progress_export.configure(maximum = total, value = sum(done for done, total in self.export_files.values()))
+        if not all(future.done() for name, future in self.export_writers):
+            self.master.after(self.export_poll, self.poll_export)
+            return
+        self.data.finish_export(self.export_writers, self.error)
+        self.export_writers = None
+        self.cancel_export.state(['disabled'])
+        self.lock_export(False)
+
+    def lock_export(self, locked):
+        ''' Disables the controls that load another table or frequency while the exported files
+            are written from the loaded one, enables them again when not locked
+        '''
+        for widget in (self.browse, self.load_file, self.export_file, self.bits_menu, self.frequency_menu):
+            widget.state(['disabled' if locked else '!disabled'])
+
+    def cancel_exporting(self):
+        if self.export_writers is not None:
+            self.export_cancel.set()
+            error_message(self.error, "Cancelling export...")
     
-    def frame_width(self, event):
-        self.canvas_values.configure(scrollregion = self.canvas_values.bbox("all"))
-        
     def bits_selected(self, event):
         self.clear_canvas()
         self.frequency_menu.set("")
@@ -399,573 +509,114 @@ class GUI:
     def frequency_selected(self, event):
         self.clear_canvas()
         self.axis_menu.configure(state = 'readonly')
-        self.axis_menu.config(values = axes)
+        self.axis_menu.config(values = self.data.table.axes())
         self.axis_menu.set("")
         self.current_frequency = self.frequency.get()
         self.current_axis = None
+        self.data.load_frequency(self.current_frequency)
             
     def axis_selected(self, event):
         self.clear_canvas()
         self.current_axis = self.axis.get()
-        self.data.display(self.frame_values, self.current_frequency, self.current_axis, self.current_bits, self.error)
+        self.data.display(self.register_grid, self.current_frequency, self.current_axis, self.current_bits, self.error)
 
     def save_changes(self):
         if self.data.can_apply(self.current_frequency, self.current_axis, self.error):
             error_message(self.error, "")
             self.data.apply(self.current_frequency, self.current_axis)
-            self.clear_canvas()
-            self.data.display(self.frame_values, self.current_frequency, self.current_axis, self.current_bits, self.error)
+            # rows stay bound to the same fields, only the applied values are rewritten
+            self.data.display(self.register_grid, self.current_frequency, self.current_axis, self.current_bits, self.error)
 
     
     def clear_canvas(self):
         if self.current_axis:
             self.data.clear(self.current_frequency, self.current_axis)
         error_message(self.error, "")
-        self.frame_values.destroy()
-        self.canvas_values.delete("all")
-        self.frame_values = ttk.Frame(self.canvas_values)
-        self.canvas_values.create_window(0, 0, window = self.frame_values, anchor = NW)
-        self.frame_values.bind("<Configure>", self.frame_width)
-        self.canvas_values.yview_moveto(0)
+        self.register_grid.clear()
         
 class Data:
-    ''' Contains the parsed information from DVFS table
-        self.data:              dicts with parsed information from DVFS table in the order of frequency, register, then value
-        self.display_registers: dicts with tree of frequency, register, axis, channel, register, field, field info/value
-                                for registers in config file that tool will display in GUI
-        self.cfg_dict:          dict with key as register name in cfg, and value as tuple of axis, channel, and register
-                                the corresponding DVFS register can be found at in the display_registers dict
-        self.training:          dict with frequency and axis keys which stores a boolean depicting whether the axis uses training 
-                                registers instead for that frequency
-        self.bypass:            dict with frequency and axis keys which stores whether the axis has PI Bypass enabled or not
-                                which will increase the step size to 8 for field values
-        self.register_mask:     dict with DVFS register name as key, and bitmask for bits that should not be changed/touched as value        
-        self.frequencies:       list of frequencies found in DVFS table
+    ''' Adapter of the headless DVFS_Table for the GUI, showing its errors and status in the
+        error entry
+        
+        self.table: DVFS_Table with the parsed information from DVFS table
     '''
     def __init__(self):
-        self.data = dict()
-        self.display_registers = dict()
-        self.cfg_dict = dict()
-        self.training = dict()
-        self.bypass = dict()
-        self.register_mask = dict()
-        self.frequencies = list()
-
-    def parse_file(self, inputfilepath, error):
-        dictionary = dict()
-        self.data.clear()
-        self.display_registers.clear()
-        self.cfg_dict.clear()
-        self.training.clear()
-        self.frequencies.clear()
-        self.register_mask.clear()
-        self.bypass.clear()
-        
-        with open(inputfilepath, 'rt') as in_file:
-            for line in in_file:
-                line_list = line.split(',')
-                if len(line_list) > 1:
-                    value = line_list[0].lstrip()
-                    register = line_list[1]
-                    if not register.isspace():
-                        register = register.strip('/* \n')
-                        dictionary[register] = value
-                        if register == "PLLHUB_ENABLE_FREQ_CHANGE":    # register near end of table
-                            frequency = dictionary["SDRAM frequency khz"]
-                            self.frequencies.append(frequency)
-                            self.data[frequency] = dict(dictionary)
-                            dictionary.clear()
-        try:
-            frequency = self.frequencies[0]
-        except IndexError:
-            error_message(error, "ERROR: Invalid file")
-            return
-        
-        # checks if unique register in config list for each processor exists
-        for tegra, register in processor_register.items():
-            try:
-                self.data[frequency][register]
-            except KeyError:
-                pass
-            else:
-                processor = tegra
-                error_message(error, "Parsed " + tegra + " DVFS Table")
-        for frequency in self.data:
-            # checks which frequency for these axes needs training
-            dictionary = self.data[frequency]
-            self.training[frequency] = dict()
-            needs_training = dictionary["needs_training"]
-            write_byte_training = separate_bits(4, 4, needs_training)
-            write_vref_training = separate_bits(5, 5, needs_training)
-            read_byte_training = separate_bits(6, 6, needs_training)
-            read_vref_training = separate_bits(7, 7, needs_training)
-            write_leveling = separate_bits(10, 10, needs_training)
-            self.training[frequency]["OBDQ"] = True if write_byte_training else False
-            self.training[frequency]["DQVREF"] = True if write_vref_training else False
-            self.training[frequency]["RDQS"] = True if read_byte_training else False
-            self.training[frequency]["DQIVREF"] = True if read_vref_training else False
-            self.training[frequency]["WCKDQ"] = True if write_leveling else False
-            # checks which frequency for these axes has PI_BYPASS enabled so step size will be 8 instead
-            self.bypass[frequency] = dict()
-            needs_bypass = dictionary["EMC_PMACRO_DDLL_BYPASS_0"]
-            
-            #if processor != "T186":
-            OBCLK_bypass = separate_bits(25, 25, needs_bypass)
-            OBCMD1t_bypass = separate_bits(24, 24, needs_bypass)
-            WCKDQ_bypass = separate_bits(19, 19, needs_bypass)
-            RDQS_bypass = separate_bits(10, 10, needs_bypass)
-            OBDQS_bypass = separate_bits(9, 9, needs_bypass)
-            OBDQ_bypass = separate_bits(8, 8, needs_bypass)
-
-            #else:                
-            #    OBCLK_bypass = separate_bits(17, 17, needs_bypass)
-            #    OBCMD1t_bypass = separate_bits(16, 16, needs_bypass)
-            #    RDQS_bypass = separate_bits(2, 2, needs_bypass)
-            #    OBDQS_bypass = separate_bits(1, 1, needs_bypass)
-            #    OBDQ_bypass = separate_bits(0, 0, needs_bypass)
-            self.bypass[frequency]["OBCLK"] = True if OBCLK_bypass else False
-            self.bypass[frequency]["OBCMD1t"] = True if OBCMD1t_bypass else False
-            self.bypass[frequency]["WCKDQ"] = True if WCKDQ_bypass else False
-            self.bypass[frequency]["RDQS"] = True if RDQS_bypass else False
-            self.bypass[frequency]["OBDQS"] = True if OBDQS_bypass else False
-            self.bypass[frequency]["OBDQ"] = True if OBDQ_bypass else False
-            
-#        imports config file and aremc contents
-        config_file = "config" + processor
+        self.table = dvfs_table.DVFS_Table()
+
+    @property
+    def frequencies(self):
+        return self.table.frequencies
+
+    def parse_file(self, inputfilepath, error, workers = None):
+        ''' Returns whether the DVFS table was loaded
+        '''
         try:
-            my_module = importlib.__import__(config_file, globals(), locals(), [], 0)
-        except ModuleNotFoundError:
-            error_message(error, "ERROR: " + config_file + " not supported")
-            return
-        module_dict = my_module.__dict__
+            processor = self.table.parse_file(inputfilepath, workers)
+        except dvfs_table.Table_Error as exception:
+            error_message(error, f"ERROR: {exception}")
+            return False
+        error_message(error, "Parsed " + processor + " DVFS Table")
+        return True
+
+    def parse_variant(self, variantpath, error, workers = None):
+        ''' Returns whether the base table of a variant was loaded with the deltas of the
+            variant applied
+        '''
         try:
-            to_import = my_module.__all__
-        except AttributeError:
-            to_import = [name for name in module_dict if not name.startswith('_')]
-        globals().update({name: module_dict[name] for name in to_import})
-
-#       filters through list of registers for ones we want to display/edit
-        for frequency in self.frequencies:
-            self.display_registers[frequency] = dict()
-            bit_partition(self.data[frequency], self.cfg_dict, self.display_registers[frequency], self.register_mask)
-        self.data.clear()
-                            
-    def display(self, frame_values, frequency, axis, bits, error):
+            processor = dvfs_variant.open_variant(self.table, variantpath, workers)
+        except (dvfs_table.Table_Error, OSError) as exception:
+            error_message(error, f"ERROR: {exception}")
+            return False
+        error_message(error, "Parsed " + processor + " DVFS Table variant")
+        return True
+
+    def load_frequency(self, frequency):
+        self.table.load_frequency(frequency)
+
+    def display(self, register_grid, frequency, axis, bits, error):
         ''' Displays the registers, fields, and value of the axis selected
+            Parameters:
+                register_grid: Register_Grid to display the fields in
         '''
-        ttk.Label(frame_values, text = "Channel").grid(row = 0, column = 0, padx = (20,20))
-        ttk.Label(frame_values, text = "Register").grid(row = 0, column = 1)
-        ttk.Label(frame_values, text = "Field").grid(row = 0, column = 2)
-        ttk.Label(frame_values, text = "Value").grid(row = 0, column = 3)
-        frame = ttk.Frame(frame_values)
-        frame.grid(row = 0, column = 4)
-        ttk.Label(frame_values, text = "Change").grid(row = 0, column = 5)
-        step = 1
-        if axis in self.bypass[frequency]:
-            if self.bypass[frequency][axis]:
-                step = 8
-
-        row = 1
-        if axis == "CMDVREF":
-            select = ((0, 1), 2)
-        if axis in self.training[frequency]:
-            if self.training[frequency][axis]:
-                axis = axis + " (training)"
-                step = 1
-        if axis in counter_specific_fields:
-            select = counter_specific_fields[axis]
-        elif axis == "AutocaloffsetDQTerm":
-            select = ((2,), 4)
-            axis = "AutocaloffsetDQ/STerm"
-        elif axis == "AutocaloffsetDQSTerm":
-            select = ((0,), 4)
-            axis = "AutocaloffsetDQ/STerm"
-        else:
-            select = ((0,), 1)
-        if (axis == "DQIVREF (training)") | (axis == "DQVREF (training)"):
-            group = VREF_Counter(frame, step)
-        else:
-            group = Group_Counter(frame, step)
-        if axis not in self.display_registers[frequency]:
-            error_message(error,"ERROR: Axis may be unnecessary for selected frequency")
+        try:
+            group, rows = self.table.axis_rows(frequency, axis, self.table.channels(bits))
+        except dvfs_table.Table_Error as exception:
+            error_message(error, f"ERROR: {exception}")
             return
+        register_grid.show(group, rows)
 
-        for channel in self.display_registers[frequency][axis]:
-            if channel in channel_select[bits]:
-                ttk.Label(frame_values, text = channel).grid(row = row, column = 0)
-                for register in self.display_registers[frequency][axis][channel]:
-                    ttk.Label(frame_values, text = register).grid(row = row, column = 1, padx = (5,5))
-                    index = 0
-                    for field, field_info in sorted(self.display_registers[frequency][axis][channel][register].items()):
-                        if index % select[1] in select[0]:
-                            ttk.Label(frame_values, text = field).grid(row = row, column = 2, padx = (20,20))
-                            ttk.Label(frame_values, text = f"{field_info.value:#x}").grid(row = row, column = 3)
-                            frame = ttk.Frame(frame_values)
-                            frame.grid(row = row, column = 4)
-                            total_frame = ttk.Frame(frame_values)
-                            total_frame.grid(row = row, column = 5)
-                            if field_info.two:
-                                counter = Two_Counter(frame, total_frame, field_info)
-                            else:
-                                counter = Counter(frame, total_frame, field_info)
-                            group.add(counter)
-                            self.display_registers[frequency][axis][channel][register][field].set_counter(counter)
-                            row += 1
-                        index += 1
-                        
-    def check_axis(self, frequency, axis):
-        if axis in self.training[frequency]:
-            if self.training[frequency][axis]:
-                axis = axis + " (training)"
-        elif (axis == "AutocaloffsetDQTerm") | (axis == "AutocaloffsetDQSTerm"):
-            axis = "AutocaloffsetDQ/STerm"
-        return axis
-                
     def can_apply(self, frequency, axis, error):
-        ''' Checks if the intended modification of all values are within bounds
-            of field's bit length
-            Parameters:
-                error: tkinter entry to display messages on
-        '''
-        axis = self.check_axis(frequency, axis)
         try:
-            self.display_registers[frequency][axis]
-        except KeyError:
-            return 
-        for channel in self.display_registers[frequency][axis]:
-            for register in self.display_registers[frequency][axis][channel]: 
-                for field, field_info in self.display_registers[frequency][axis][channel][register].items():
-                    if field_info.counter is not None:
-                        bits = field_info.bits
-                        two = field_info.two
-                        new_value = field_info.counter.get_change()
-                        if within_bounds(new_value, bits, two) == False:
-                            error_message(error, f"ERROR: Out of bounds, {bits:d}-bit number for {field}")
-                            return False
-        return True
-                    
+            return self.table.can_apply(frequency, axis)
+        except dvfs_table.Table_Error as exception:
+            error_message(error, f"ERROR: {exception}")
+            return False
+
     def apply(self, frequency, axis):
-        ''' Applies the changes to the values
-        '''
-        axis = self.check_axis(frequency, axis)
-        for channel in self.display_registers[frequency][axis]:
-            for register in self.display_registers[frequency][axis][channel]: 
-                for field, field_info in self.display_registers[frequency][axis][channel][register].items():
-                    if field_info.counter is not None:
-                        new_value = field_info.counter.get_change()
-                        field_info.counter.reset_value()
-                        new_value = twos_complement(new_value, field_info.bits)
-                        self.display_registers[frequency][axis][channel][register][field].value = new_value
-                        self.display_registers[frequency][axis][channel][register][field].remove_counter()
+        self.table.apply(frequency, axis)
 
     def clear(self, frequency, axis):
-        ''' Clears the counter values
-        '''
-        axis = self.check_axis(frequency, axis)
-        if axis not in self.display_registers[frequency]:
-            return
-        for channel in self.display_registers[frequency][axis]:
-            for register in self.display_registers[frequency][axis][channel]: 
-                for field, field_info in self.display_registers[frequency][axis][channel][register].items():
-                    if field_info.counter is not None:
-                        self.display_registers[frequency][axis][channel][register][field].remove_counter()
-                
-    def export(self, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, error, selected_frequency):
-        ''' Prints new DVFS file with modifications
-            Parameters:
-                inputfilepath: path to DVFS table text file
-                outputfilepath: path to output directory otherwise empty string
-                deratedfile: path to derated file
-                cfgfile: path to cfg file
-                addendum: string to attach at end of original file name for new table
-                error: tkinter entry to display messages on
-        '''
-        self.export_dvfs_file(inputfilepath, inputfilepath, outputfilepath, addendum, error)
-        
-        exported = True
-        if deratedfile:
-            exported = self.export_dvfs_file(deratedfile, inputfilepath, outputfilepath, addendum, error)
-
-        if cfgfile:
-            cfgpath = ""
-            if not outputfilepath:
-                cfgname = cfgfile.rsplit(".", 1)[0]
-                cfgpath = cfgname + addendum + ".cfg"
-            else:
-                cfgname = cfgfile.rsplit("/", 1)[1].rsplit(".", 1)[0]
-                cfgpath = outputfilepath + "/" + cfgname + addendum + ".cfg"
-            with open(cfgfile, 'rt') as in_file:
-                with tempfile.TemporaryFile(mode='wt+', delete=False) as out_file:
-                    frequency = "665600"
-                    for comment in in_file:
-                        # checks for cfg frequency, defaulted to 204 Mhz
-                        out_file.write(comment)
-                        if comment.startswith("# "):
-                            match = re.match(r"# Parameter file: .+\(([\d,.]+) MHz\)", comment)
-                            if match:
-                                frequency = str(int(float(match.group(1)) * 1000))
-                                break
-                        else:
-                            print("Cfg frequency not matched")
-                            break
-                            
-                  # try to update when frequency is 665.6Mhz 
-                    if frequency == "665600" and self.frequency == "665600":
-                        for line in in_file:
-                            if line.startswith("SDRAM") or line.startswith("#@ EMC_MRW"):
-                                mrw = False
-                                if line.startswith("SDRAM"):
-                                    line_list = line.rsplit('=', 1)
-                                    value = line_list[1].strip(' ;\n')
-                                    register_name = line_list[0].lstrip('SDRAM[0]. ')
-                                    register_name = register_name.rstrip()
-                                    if register_name.startswith("EmcMrw")or register_name.startswitch("EmcWarmBootMrwExtra"):
-                                        # checks register address (MA)
-                                        if separate_bits(23, 16, value) == 0xe:
-                                            axis = "DQVREF"
-                                            channel = '0'
-                                            register_name = "EMC_MRW15_0"
-                                            mrw = True
-                                        elif separate_bits(23, 16, value) == 0xc:
-                                            axis = "CMDVREF"
-                                            channel = '0'
-                                            register_name = "R0_DRAM_MR12"
-                                            mrw = True
-                                '''            
-                                elif line.startswith("#@ EMC_MRW"):
-                                    line_list = line.rsplit('=', 1)
-                                    value = line_list[1].strip(' ;\n')
-                                    register_name = line_list[0].rsplit('{', 1)[0]
-                                    register_name = register_name.lstrip('#@ ')
-                                    register_name = register_name.rstrip()
-                                    if separate_bits(23, 16, value) == 0xe:
-                                        axis = "DQVREF"
-                                        channel = '0'
-                                        register_name = "EMC_MRW15_0"
-                                        mrw = True
-                                    elif separate_bits(23, 16, value) == 0xc:
-                                        axis = "CMDVREF"
-                                        channel = '0'
-                                        register_name = "R0_DRAM_MR12"
-                                        mrw = True
-                                    '''    
-                                if register_name in self.cfg_dict:
-                                    axis, channel, register_name = self.cfg_dict[register_name]
-                                    mask = self.register_mask[register_name]
-                                    field_values = self.display_registers[frequency][axis][channel][register_name]
-                                    new_value = edit(field_values, value, mask)
-                                    line = line.replace(value, f"{new_value:#0{10}x}")
-                                elif mrw:
-                                    mask = 0xffff0000  # remove DEV_SELECTN
-                                    field_values = self.display_registers[frequency][axis][channel][register_name]
-                                    new_value = edit(field_values, value, mask)
-                                    line = line.replace(value, f"{new_value:#0{10}x}")
-                            out_file.write(line)
-                        copyfile(out_file.name, cfgpath)
-                        os.remove(out_file.name)
-                    else:
-                        error_message(error, "ERROR: Frequency is not 665600, cfg file will not be updated")
-                    
-        if exported is True:
-            error_message(error, "Export successful!")
+        self.table.clear(frequency, axis)
 
-    def export_dvfs_file(self, file, inpath, outpath, addendum, error):
-        ''' Method to create new table for DVFS and derated because of text format similarity
+    def start_export(self, executor, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, progress, cancel):
+        ''' Starts writing the exported files on executor, returns writers for finish_export
         '''
-        if not outpath:
-            name = file.rsplit(".", 1)[0]
-            path = name + addendum + ".txt"
-        else:
-            name = file.rsplit("/", 1)[1].rsplit(".", 1)[0]
-            path = outpath + "/" + name + addendum + ".txt"
-        with open(file, 'rt') as in_file:
-            with tempfile.TemporaryFile(mode='wt+', delete=False) as out_file:
-                for line in in_file:
-                    line_list = line.split(',')
-                    if len(line_list) > 1:
-                        value = line_list[0].lstrip()
-                        register_name = line_list[1]
-                        if not register_name.isspace():
-                            register_name = register_name.strip('/* \n')
-                            if register_name == "SDRAM frequency khz":
-                                frequency = value
-                                if frequency not in self.display_registers:
-                                    print(f"{frequency}Hz in derated not found in DVFS table")
-                                    return False
-                            register_name = register_name.split("-", 1)[0]  # removes appended info
-                            register_name = register_name.split(";", 1)[0]  # removes appended info
-                            register_name = register_name.rstrip("; ")
-                            if register_name.startswith("R0"):
-                                for axis in self.display_registers[frequency]:
-                                    for channel in self.display_registers[frequency][axis]:
-                                        if register_name in self.display_registers[frequency][axis][channel]:
-                                            mask = self.register_mask[register_name]
-                                            new_value = edit(self.display_registers[frequency][axis][channel][register_name], value, mask)
-                                            line = line.replace(value, f"{new_value:#0{10}x}")
-                            elif register_name.startswith("EMC"):
-                                for axis in self.display_registers[frequency]:
-                                    for channel in self.display_registers[frequency][axis]:
-                                        if register_name in self.display_registers[frequency][axis][channel]:
-                                            mask = self.register_mask[register_name]
-                                            new_value = edit(self.display_registers[frequency][axis][channel][register_name], value, mask)
-                                            line = line.replace(value, f"{new_value:#0{10}x}")
-                    out_file.write(line)
-            copyfile(out_file.name, path)
-            os.remove(out_file.name)
-        return True
-
-def bit_partition(dictionary, cfg_dict, display_registers, register_mask):
-    ''' uses registers_to_display list in config file to parse DVFS table into dictionaries
-    '''
-    
-    for register, aremc_name, cfg_name, axis, twos_complement in registers_to_display:
-        partition_register(dictionary, cfg_dict, display_registers, register_mask, register, aremc_name, cfg_name, axis, twos_complement)
-
-    
-def partition_register(dictionary, cfg_dict, display_registers, register_mask, register, aremc_name, cfg_name, axis, two):
-    ''' Finds registers that start with register variable name and stores into
-        dictionary using information from aremc file
-        
-        Parameters:
-            dictionary:         Dictionary of registers and their values for a single frequency
-            display_registers:  Dictionary of already parsed values stored in through axis, channel, register
-            register_mask:      Dictionary to store mask for each register
-            register:           Register name in DVFS table
-            aremc_name:         Register name in aremc file
-            cfg_name:           Register name in cfg file
-            axis:               Axis the register belongs to
-            two:                Boolean for whether value is in two's complement representation
-    '''  
-    matched_registers = {k:v for k, v in dictionary.items() if re.match(register, k)}
-    #print(matched_registers)
-    ##print(dictionary)
-    ## matched_registers = {k:v for k, v in dict_item if re.match(register, k)}
-
-    bits = dict()
-    if axis not in display_registers:
-        display_registers[axis] = dict()
-
-    for specific_register, register_value in matched_registers.items():
-        bits.clear()
-           
-        specific_register = specific_register.split("-", 1)[0] # removes appended info
-        specific_register = specific_register.split(";", 1)[0] # removes appended info
-        specific_register = specific_register.rstrip("; ")
-        
-#        uses groups from DVFS table name to generate cfg and aremc name
-        register_name = re.sub(register, aremc_name, specific_register)
-        cfg = re.sub(register, cfg_name, specific_register)
+        return self.table.submit_export(executor, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, progress, cancel)
 
-#        checks for channel group
-        channel = re.match(register, specific_register)
+    def finish_export(self, writers, error):
         try:
-            channel.group('CH')
-        except IndexError:
-            channel_display = ""
-        else:
-            channel_display =  channel.group('CH')
-        if channel_display not in display_registers[axis]:
-            display_registers[axis][channel_display] = dict()
-        #       stores key info in cfg dict for easier lookup when retrieving corresponding register value in DVFS
-        cfg_dict[cfg] = (axis, channel_display, specific_register)
-
-        if specific_register == 'R0_DRAM_MR12':
-            if specific_register not in display_registers[axis][channel_display]:        
-                register_mask[specific_register] = 0xFFFFFFFF - registers['R0'][register_name]['write_mask']
-                display_registers[axis][channel_display][specific_register] = dict()    
-
-            for field in registers['R0'][register_name]['field_list']:
-                num_bits = registers['R0'][register_name][field]['size']
-                bit_location = registers['R0'][register_name][field]['lsb']
-                field_value = (registers['R0'][register_name][field]['field'] & int(register_value, 16)) >> bit_location
-                bits[field] = Field_Info(field_value, num_bits, two, bit_location)    
+            problems = self.table.finish_export(writers)
+        except dvfs_table.Table_Error as exception:
+            error_message(error, f"ERROR: {exception}")
+            return
+        self.export_message(problems, error)
+
+    def export_message(self, problems, error):
+        if problems:
+            error_message(error, "ERROR: " + "; ".join(problems))
         else:
-            if specific_register not in display_registers[axis][channel_display]:    
-                register_mask[specific_register] = 0xFFFFFFFF - registers['EMC'][register_name]['write_mask']
-                display_registers[axis][channel_display][specific_register] = dict()   
-
-            for field in registers['EMC'][register_name]['field_list']:
-                num_bits = registers['EMC'][register_name][field]['size']
-                bit_location = registers['EMC'][register_name][field]['lsb']
-                field_value = (registers['EMC'][register_name][field]['field'] & int(register_value, 16)) >> bit_location
-                bits[field] = Field_Info(field_value, num_bits, two, bit_location)
-            #print(specific_register, field_value)                                 
-        display_registers[axis][channel_display][specific_register].update(bits)
-        
-def edit(values, value, mask):
-    ''' Returns the new register value after replacing the bits edited by tool
-        Parameters:
-            values: dict with field as key and an array as value
-                    array index:
-                        0: value of field
-                        3: lsb of field
-            value:  original value of register in DVFS
-            mask:   mask for bits changed by tool
-    '''
-    edit_value_mask = 0xFFFFFFFF - mask
-    complete = 0
-    for field, field_info in values.items():
-        complete = complete | (field_info.value << field_info.lsb)
-    complete = complete & edit_value_mask
-    value = int(value, 16) & mask
-    return value | complete
-                
-            
-def separate_bits(start, end, number):
-    ''' Returns a binary number specified by its msb and lsb extracted from a larger number
-        Used to extract field value from a register value
-        Parameters:
-            start:  msb of binary number to return
-            end:    lsb of binary number to return
-            number: overall number to extract specific bits from
-    '''
-    number = int(number, 16) >> end
-    exp = start-end+1
-    mask = (2**exp) - 1
-    number = number & mask
-    return number
-
-def twos_complement_value(value, bits):
-    ''' Returns the decimal value of a two's complement number
-        Parameters:
-            value: two's complement number
-            bits: number of bits in number
-    '''
-    if (value & (1 << (bits - 1))) != 0:
-        value = value - (1 << bits)
-    return value
+            error_message(error, "Export successful!")
 
-def twos_complement(value, bits):
-    ''' Returns two's complement form of a decimal number
-        Parameters:
-            value: decimal value
-            bits: number of bits
-    '''
-    if value < 0:
-        value = bin(-value)
-        value = value[2:].zfill(bits)
-        value = "".join('1' if x == '0' else '0' for x in value)
-        value = int(value, 2) + 1
-    return value
-    
-def within_bounds(value, bits, two):
-    ''' Returns a boolean on whether the number is within bounds of bit length
-        Parameters:
-            value:  decimal value
-            bits:   number of bits
-            two:    whether two's complement
-    '''
-    if two:
-        min_val = -(1 << (bits - 1))
-        max_val = (1 << (bits - 1)) - 1
-    else:
-        min_val = 0
-        max_val = (1 << bits) - 1
-    if (value > max_val) | (value < min_val):
-        return False
-    else:
-        return True
-    
 def error_message(error, text):
     ''' Displays text in a tkinter entry
         Parameters:
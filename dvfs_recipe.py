@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Axis offset recipes applied to DVFS tables
+
+Description:
+A recipe lists the changes to make to a DVFS table so the same margin offsets can be
+applied to many tables and frequencies without clicking through the GUI. Axis changes
+are in steps of the group buttons of the GUI, so they follow the same training and
+PI bypass rules, field changes add a delta to a single field.
+
+Recipe is a JSON file, or a YAML file when PyYAML is installed:
+    {
+        "table":        "table.txt",            DVFS table, can be given on command line instead
+        "derated":      "derated.txt",          optional
+        "cfg":          "table.cfg",            optional, or a directory of cfg files
+        "output":       "out",                  output directory, beside inputs if omitted
+        "addendum":     "_margin",              appended to output file names
+        "overwrite":    false,                  required to write over the inputs
+        "bits":         "256",                  bus width whose channels are changed, all if omitted
+        "frequencies":  ["665600", "2133000"],  all frequencies of table if omitted
+        "changes": [
+            {"axis": "RDQS", "steps": 3},
+            {"axis": "AutocaloffsetDQ", "steps": 1, "channels": "0-7"},
+            {"axis": "OBDQ", "channel": "0", "register": "EMC_PMACRO_OB_DDLL_LONG_DQ_RANK0_0_0_CH0",
+             "field": "OB_DDLL_LONG_DQ_RANK0_BYTE0", "delta": -2}
+        ]
+    }
+"changes" can also be a dict with axis as key and steps as value, e.g. {"RDQS": 3, "OBDQ": -2}.
+A recipe with a "sweep" key generates a variant for each combination of axis offsets,
+see dvfs_sweep.
+"""
+import json
+import os
+from dvfs_table import Table_Error
+
+# Keys a recipe can have, and keys of a single change
+RECIPE_KEYS = ("table", "derated", "cfg", "output", "addendum", "overwrite", "bits", "frequencies", "changes", "sweep")
+CHANGE_KEYS = ("axis", "steps", "channels", "channel", "register", "field", "delta")
+
+
+def load_recipe(path):
+    ''' Returns recipe read from a JSON or YAML file, raises Table_Error if it is invalid
+    '''
+    with open(path, 'rt') as recipe_file:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise Table_Error("PyYAML is required for YAML recipes") from None
+            try:
+                recipe = yaml.safe_load(recipe_file)
+            except yaml.YAMLError as exception:
+                raise Table_Error(f"Invalid recipe {path}: {exception}") from None
+        else:
+            try:
+                recipe = json.load(recipe_file)
+            except ValueError as exception:
+                raise Table_Error(f"Invalid recipe {path}: {exception}") from None
+    return check_recipe(recipe)
+
+
+def check_recipe(recipe):
+    ''' Returns recipe with its changes as a list of dicts, raises Table_Error if it is invalid
+    '''
+    if not isinstance(recipe, dict):
+        raise Table_Error("Recipe must be a mapping")
+    unknown = [key for key in recipe if key not in RECIPE_KEYS]
+    if unknown:
+        raise Table_Error(f"Unknown recipe keys: {', '.join(unknown)}")
+    recipe = dict(recipe)
+    changes = recipe.get("changes", list())
+    if isinstance(changes, dict):
+        changes = [{"axis": axis, "steps": steps} for axis, steps in changes.items()]
+    for change in changes:
+        unknown = [key for key in change if key not in CHANGE_KEYS]
+        if unknown:
+            raise Table_Error(f"Unknown change keys: {', '.join(unknown)}")
+        if "axis" not in change:
+            raise Table_Error(f"Change without axis: {change}")
+        if "field" in change:
+            if not all(key in change for key in ("channel", "register", "delta")):
+                raise Table_Error(f"Field change needs channel, register, field and delta: {change}")
+            if not isinstance(change["delta"], int) or isinstance(change["delta"], bool):
+                raise Table_Error(f"Field change needs an integer delta: {change}")
+        elif not isinstance(change.get("steps"), int) or isinstance(change["steps"], bool):
+            raise Table_Error(f"Axis change needs an integer number of steps: {change}")
+    recipe["changes"] = changes
+    if "frequencies" in recipe:
+        recipe["frequencies"] = [str(frequency) for frequency in recipe["frequencies"]]
+    if "bits" in recipe:
+        recipe["bits"] = str(recipe["bits"])
+    return recipe
+
+
+def parse_channels(channels):
+    ''' Returns tuple of channel names from a list of channels or a string of channels and
+        ranges such as "0-7" or "0,2,4-6"
+    '''
+    if isinstance(channels, (int, str)):
+        channels = str(channels).split(",")
+    names = list()
+    for channel in channels:
+        channel = str(channel).strip()
+        if "-" in channel:
+            first, last = channel.split("-", 1)
+            names.extend(str(number) for number in range(int(first), int(last) + 1))
+        else:
+            names.append(channel)
+    return tuple(names)
+
+
+def apply_recipe(table, recipe):
+    ''' Applies the changes of recipe to every frequency of the recipe in a loaded DVFS_Table,
+        each axis change to all frequencies at once with DVFS_Table.step_frequencies
+        Returns list of messages of changes skipped because the axis is not in a frequency,
+        raises Table_Error if an axis or bus width is unknown or a value goes out of bounds
+    '''
+    axes = table.axes()
+    for change in recipe["changes"]:
+        if change["axis"] not in axes:
+            raise Table_Error(f"Unknown axis {change['axis']}")
+    # a frequency repeated in the recipe is changed once
+    frequencies = list(dict.fromkeys(recipe.get("frequencies") or table.frequencies))
+    for frequency in frequencies:
+        if frequency not in table.frequencies:
+            raise Table_Error(f"{frequency} not found in DVFS table")
+    if "bits" in recipe and recipe["bits"] not in table.bus_widths():
+        raise Table_Error(f"Unknown bus width {recipe['bits']}, expected one of {', '.join(table.bus_widths())}")
+    bus_channels = table.channels(recipe["bits"]) if "bits" in recipe else None
+    skipped = set()
+    for number, change in enumerate(recipe["changes"]):
+        axis = change["axis"]
+        if "field" in change:
+            for frequency in frequencies:
+                try:
+                    table.change_field(frequency, axis, str(change["channel"]), change["register"],
+                                       change["field"], change["delta"])
+                except Table_Error as exception:
+                    raise Table_Error(f"{frequency} {axis}: {exception}") from None
+            continue
+        channels = bus_channels
+        if "channels" in change:
+            channels = parse_channels(change["channels"])
+            if bus_channels is not None:
+                channels = tuple(channel for channel in channels if channel in bus_channels)
+        skipped.update((frequency, number) for frequency in table.step_frequencies(frequencies, axis, change["steps"], channels))
+    return [f"{change['axis']} not in {frequency}, skipped" for frequency in frequencies
+            for number, change in enumerate(recipe["changes"]) if (frequency, number) in skipped]
+
+
+def export_recipe(table, recipe):
+    ''' Exports the DVFS, derated and cfg files named in recipe, returns list of messages of
+        the files that could not be exported
+    '''
+    if not (recipe.get("output") or recipe.get("addendum") or recipe.get("overwrite")):
+        raise Table_Error("Addendum or output directory required if not overwriting original file")
+    return table.export(table_path(recipe["table"]), table_path(recipe.get("output", "")),
+                        table_path(recipe.get("derated", "")), table_path(recipe.get("cfg", "")),
+                        recipe.get("addendum", ""))
+
+
+def table_path(path):
+    ''' Returns absolute path with forward slashes as given by the GUI file dialogs,
+        empty if path is empty
+    '''
+    if not path:
+        return ""
+    return os.path.abspath(path).replace(os.sep, "/")
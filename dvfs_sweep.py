@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Shmoo sweep of axis offsets over a DVFS table
+
+Description:
+Generates a variant of the DVFS, derated, and cfg files for every combination of the
+offsets of the swept axes, e.g. a grid of RDQS x DQIVREF offsets. The base table is
+parsed once, with the "changes" of the recipe applied, and sent to a pool of worker
+processes which restore the base values and apply the offsets of each variant before
+exporting it. Combinations are enumerated lazily and only a few are queued per worker
+at a time, so large sweeps do not build the whole product up front.
+
+A sweep is a recipe (see dvfs_recipe) with a "sweep" key, offsets are in steps of the
+group buttons of the GUI, given as a list or as an inclusive range:
+    "sweep": {
+        "RDQS":     {"start": -4, "stop": 4, "step": 2},
+        "DQIVREF":  [-2, 0, 2]
+    }
+Each variant is exported with the offsets appended to its file names, and a manifest
+mapping the files of each variant to its offsets is written to the output directory.
+
+Variants are exported through a content store in the output directory, identical files,
+e.g. from offsets saturating at field limits or axes absent at some frequencies, are
+written once and hard linked to every variant, the manifest gives the sha256 digest of
+the contents of each file.
+"""
+import itertools
+import json
+import os
+import dvfs_table
+import dvfs_recipe
+import output_file
+from dvfs_table import Table_Error
+
+MANIFEST = "sweep_manifest.json"
+# Directory in output directory of the content store of the exported files
+STORE = ".sweep_store"
+# Variants queued per worker process
+QUEUED_PER_WORKER = 2
+
+# Base table of a worker process and the base value of every field, set by start_worker
+worker_table = None
+worker_values = None
+
+
+def sweep_offsets(sweep):
+    ''' Returns list of tuples of axis and sequence of offsets of a sweep
+    '''
+    if not isinstance(sweep, dict) or not sweep:
+        raise Table_Error("Sweep must map axes to offsets")
+    axes = list()
+    for axis, offsets in sweep.items():
+        if isinstance(offsets, dict):
+            try:
+                step = offsets.get("step", 1)
+                offsets = range(offsets["start"], offsets["stop"] + (1 if step > 0 else -1), step)
+            except (KeyError, TypeError, ValueError):
+                raise Table_Error(f"Sweep range of {axis} needs integer start, stop and step") from None
+        elif not isinstance(offsets, (list, tuple)):
+            raise Table_Error(f"Sweep of {axis} needs a list of offsets or a range, got {offsets!r}")
+        elif not all(isinstance(offset, int) and not isinstance(offset, bool) for offset in offsets):
+            raise Table_Error(f"Sweep offsets of {axis} must be integers")
+        if not offsets:
+            raise Table_Error(f"Sweep of {axis} has no offsets")
+        axes.append((axis, offsets))
+    return axes
+
+
+def variants(axes):
+    ''' Generator that yields dict of axis to offset for every combination of the sweep
+    '''
+    names = [axis for axis, offsets in axes]
+    for combination in itertools.product(*(offsets for axis, offsets in axes)):
+        yield dict(zip(names, combination))
+
+
+def variant_addendum(addendum, offsets):
+    ''' Returns addendum of the files of a variant, e.g. "_RDQS+2_DQIVREF-1"
+    '''
+    return addendum + "".join(f"_{axis}{offset:+d}" for axis, offset in offsets.items())
+
+
+def start_worker(state, store):
+    ''' Initializer of worker processes, loads the base table from its state
+        Parameters:
+            state:  state of the base table
+            store:  path to content store directory
+    '''
+    global worker_table, worker_values
+    worker_table = dvfs_table.DVFS_Table.from_state(state)
+    worker_table.store = output_file.Content_Store(store)
+    worker_values = [(field_info, field_info.value) for field_info in worker_table.all_fields()]
+
+
+def run_variant(recipe, offsets):
+    ''' Exports the variant of the base table of the worker with the offsets applied
+        Returns dict of manifest entry of the variant
+    '''
+    for field_info, value in worker_values:
+        field_info.value = value
+    addendum = variant_addendum(recipe.get("addendum", ""), offsets)
+    changes = [{"axis": axis, "steps": offset} for axis, offset in offsets.items() if offset]
+    entry = {"offsets": offsets, "files": list(), "digests": dict()}
+    try:
+        entry["skipped"] = dvfs_recipe.apply_recipe(worker_table, dict(recipe, changes = changes))
+        variant = dict(recipe, addendum = addendum)
+        problems = dvfs_recipe.export_recipe(worker_table, variant)
+    except (Table_Error, OSError) as exception:
+        entry["error"] = str(exception)
+        return entry
+    if problems:
+        entry["error"] = "; ".join(problems)
+    inputs = [(variant[key], ".txt") for key in ("table", "derated") if variant.get(key)]
+    if variant.get("cfg"):
+        inputs.extend((path, ".cfg") for path in dvfs_table.cfg_files(dvfs_recipe.table_path(variant["cfg"])))
+    for path, extension in inputs:
+        path = dvfs_table.output_path(dvfs_recipe.table_path(path), dvfs_recipe.table_path(variant["output"]), addendum, extension)
+        entry["files"].append(path)
+        if path in worker_table.store.digests:
+            entry["digests"][path] = worker_table.store.digests.pop(path)
+    return entry
+
+
+def sweep(recipe, workers = None):
+    ''' Generates every variant of the sweep of recipe and writes the manifest
+        Returns list of manifest entries in sweep order
+        Parameters:
+            recipe:     recipe with table, output directory, and sweep
+            workers:    number of worker processes, os.cpu_count() if None
+    '''
+    axes = sweep_offsets(recipe.get("sweep"))
+    if not recipe.get("output"):
+        raise Table_Error("Output directory required for sweep")
+    if not recipe.get("table"):
+        raise Table_Error("No input file selected")
+    table = dvfs_table.DVFS_Table()
+    table.parse_file(dvfs_recipe.table_path(recipe["table"]), workers or os.cpu_count())
+    for axis, offsets in axes:
+        if axis not in table.axes():
+            raise Table_Error(f"Unknown axis {axis}")
+    dvfs_recipe.apply_recipe(table, recipe)
+    base = dict(recipe)
+    base.pop("sweep")
+    base["overwrite"] = False
+    os.makedirs(recipe["output"], exist_ok = True)
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    workers = workers or os.cpu_count()
+    entries = dict()
+    pending = dict()
+    combinations = enumerate(variants(axes))
+    store = os.path.join(recipe["output"], STORE)
+    with ProcessPoolExecutor(max_workers = workers, initializer = start_worker, initargs = (table.state(), store)) as executor:
+        while True:
+            for number, offsets in itertools.islice(combinations, workers * QUEUED_PER_WORKER - len(pending)):
+                pending[executor.submit(run_variant, base, offsets)] = number
+            if not pending:
+                break
+            done, waiting = wait(pending, return_when = FIRST_COMPLETED)
+            for future in done:
+                entries[pending.pop(future)] = future.result()
+    output_file.Content_Store(store).prune()
+    manifest = [entries[number] for number in range(len(entries))]
+    write_manifest(os.path.join(recipe["output"], MANIFEST), recipe, manifest)
+    return manifest
+
+
+def write_manifest(path, recipe, manifest):
+    ''' Writes manifest through a temporary file so a partial manifest is never left behind
+    '''
+    with output_file.Output_File(path, 'wt') as manifest_file:
+        json.dump({"table": recipe["table"], "sweep": recipe["sweep"], "variants": manifest}, manifest_file, indent = 4)
@@ -0,0 +1,1162 @@
+# -*- coding: utf-8 -*-
+"""
+Headless DVFS table library
+
+Description:
+Loads a DVFS table, queries and edits the field values of its registers by frequency,
+axis, and channel, and exports the edited DVFS, derated, and cfg files, without any
+dependency on tkinter so it can be scripted on machines without a display. Errors are
+raised as Table_Error, the GUI in dvfs_edit_Orin is a thin adapter over DVFS_Table.
+
+The config module of the table's processor is imported when the table is loaded, and
+its contents (axes, channel_select, registers_to_display, ...) are placed in this
+module's namespace.
+"""
+from config import processor_register
+import importlib
+import mmap
+import os
+import table_index
+import register_matrix
+import partition_cache
+import field_engine
+import field_codec
+import output_file
+import cfg_file
+
+# DVFS register of the mode register written by a cfg MRW, by mode register address (MA)
+MRW_REGISTERS = {0xe: "EMC_MRW15_0", 0xc: "R0_DRAM_MR12"}
+
+
+class Table_Error(Exception):
+    ''' Raised when a DVFS table cannot be loaded, displayed, edited, or exported
+    '''
+
+
+class Field_Info:
+    ''' Stores value and information of a single field
+    
+    Parameters:
+        value: integer representation of value for field
+        bits: Number of bits the field is allocated in register value
+        two: Boolean if value is in two's complement or not
+        lsb: Location of lsb in register value
+        original: value of field in DVFS table, to tell which fields have been edited
+    '''
+    def __init__(self, value, bits, two, lsb, counter = None):
+        self.value = value
+        self.original = value
+        self.bits = bits
+        self.two = two
+        self.lsb = lsb
+        self.counter = counter
+    
+    def set_counter(self, counter):
+        self.remove_counter()
+        self.counter = counter
+        
+    def remove_counter(self):
+        if self.counter is not None:
+            del self.counter
+        self.counter = None
+
+class Counter:
+    ''' Stores the change and new value of a field made with the counter buttons
+    
+        value:  counter's value
+        total:  new value
+    '''
+    def __init__(self, field):
+        self.value = 0
+        self.total = field.value
+
+    def change(self, times):
+        self.value += times
+        self.total += times
+
+    def decrement(self):
+        self.change(-1)
+
+    def increment(self):
+        self.change(1)
+        
+    def get_value(self):
+        return self.value
+    
+    def reset_value(self):
+        self.value = 0
+
+    def get_change(self):
+        return self.total
+
+    def get_total(self):
+        ''' Returns new value as displayed
+        '''
+        return hex(self.total)
+        
+class Two_Counter(Counter):
+    ''' Similar to Counter class but increment and decrement rules are different
+        due to representation in two's complement
+        
+        self.bits:      Number of bits the field has
+        self.bin_value: decimal value of the new number
+                        cannot use self.total because total needs to store the two's complement
+                        form of the new value
+    '''
+    def __init__(self, field):
+        super().__init__(field)
+        self.bits = field.bits
+        self.bin_value = twos_complement_value(field.value, self.bits)
+                
+    def change(self, times):
+        self.bin_value += times
+        self.value += times
+        
+    def get_change(self):
+        return self.bin_value
+
+    def get_total(self):
+        if within_bounds(self.bin_value, self.bits, True):
+            return hex(twos_complement(self.bin_value, self.bits))
+        return "N/A"
+        
+
+class Group_Counter:
+    ''' Class that stores a list of Counter objects and can change them all at once,
+        a change of several steps is applied to each counter in a single operation
+    '''
+    def __init__(self, step_size):
+        self.counters = list()
+        self.step = step_size
+    
+    def add(self, counter):
+        self.counters.append(counter)
+
+    def change(self, times):
+        for counter in self.counters:
+            counter.change(times * self.step)
+        
+    def decrement(self):
+        self.change(-1)
+
+    def increment(self):
+        self.change(1)
+
+class VREF_Counter(Group_Counter):
+    ''' Special group counter because VREF registers have a sign field
+        
+        The sign and magnitude fields of a register are treated as a single signed value,
+        the sign is set when the value goes below zero and cleared when it reaches zero
+        or above
+    '''
+    def __init__(self, step):
+        super().__init__(step)
+        self.sign = list()
+        self.size = 0
+        
+    def add(self, counter):
+        if (self.size % 2) == 0:
+            self.sign.append(counter)
+        else:
+            self.counters.append(counter)
+        self.size += 1
+
+    def change(self, times):
+        for sign, counter in zip(self.sign, self.counters):
+            negative = sign.get_change() == 1
+            magnitude = counter.get_change()
+            value = (-magnitude if negative else magnitude) + times * self.step
+            if value < 0 and not negative:
+                sign.change(1)
+            elif value >= 0 and negative:
+                sign.change(-1)
+            counter.change(abs(value) - magnitude)
+
+class DVFS_Table:
+    ''' Contains the parsed information from DVFS table
+        self.display_registers: dicts with tree of frequency, register, axis, channel, register, field, field info/value
+                                for registers in config file that tool will display in GUI
+        self.cfg_dict:          dict with key as register name in cfg, and value as tuple of axis, channel, and register
+                                the corresponding DVFS register can be found at in the display_registers dict
+        self.training:          dict with frequency and axis keys which stores a boolean depicting whether the axis uses training 
+                                registers instead for that frequency
+        self.bypass:            dict with frequency and axis keys which stores whether the axis has PI Bypass enabled or not
+                                which will increase the step size to 8 for field values
+        self.register_mask:     dict with DVFS register name as key, and bitmask for bits that should not be changed/touched as value        
+        self.frequencies:       list of frequencies found in DVFS table
+        self.index:             Table_Index with byte offset range of each frequency block and register value
+                                in DVFS table, frequency blocks are only parsed into display_registers once selected
+        self.partitions:        Partition_Cache with partitioned frequency blocks of DVFS table from previous loads
+        self.processor:         processor the DVFS table is for
+        self.store:             Content_Store exported files are deduplicated through, None to write them directly
+        self.rebase:            tuple of Future of the DVFS table writer of an export over the loaded table,
+                                Table_Index of the table, and list of tuples of Field_Info and value exported,
+                                None if not overwriting
+    '''
+    def __init__(self):
+        self.index = None
+        self.partitions = None
+        self.processor = None
+        self.store = None
+        self.rebase = None
+        self.display_registers = dict()
+        self.cfg_dict = dict()
+        self.training = dict()
+        self.bypass = dict()
+        self.register_mask = dict()
+        self.frequencies = list()
+
+    def parse_file(self, inputfilepath, workers = None):
+        ''' Parses the first block of DVFS table to detect the processor and indexes the
+            frequency blocks, other blocks are parsed by load_frequency when selected
+            Returns the processor of the table, raises Table_Error if the table cannot be loaded
+            Parameters:
+                workers: number of processes to partition all frequency blocks with up front,
+                         None to only partition blocks as they are selected
+        '''
+        self.display_registers.clear()
+        self.cfg_dict.clear()
+        self.training.clear()
+        self.frequencies.clear()
+        self.register_mask.clear()
+        self.bypass.clear()
+
+        self.index = None
+        # the config of the processor selects the registers whose values are indexed
+        processor, first_block = table_config(inputfilepath)
+        self.index = load_index(inputfilepath)
+        if not self.index.blocks:
+            self.index = None
+            raise Table_Error("Invalid file")
+        self.partitions = partition_cache.Partition_Cache(self.index.digest)
+        first_frequency = self.index.blocks[0][0]
+        self.processor = processor
+        self.partitions.set_version(globals().get('config_version'))
+        self.frequencies.extend(self.index.frequencies())
+        self.load_frequency(first_frequency, first_block)
+        if workers is not None:
+            self.load_all(workers)
+        return processor
+
+    def state(self):
+        ''' Returns the loaded frequency blocks and edited values of the table as plain values
+            which can be sent to worker processes and loaded with from_state
+        '''
+        return {
+            'index': (self.index.path, self.index.digest, self.index.size, self.index.blocks, self.index.values),
+            'processor': self.processor,
+            'frequencies': self.frequencies,
+            'training': self.training,
+            'bypass': self.bypass,
+            'cfg_dict': self.cfg_dict,
+            'register_mask': self.register_mask,
+            'display': {
+                frequency: {
+                    axis: {
+                        channel: {
+                            register: {field: (field_info.original, field_info.bits, field_info.two, field_info.lsb)
+                                       for field, field_info in fields.items()}
+                            for register, fields in registers.items()
+                        }
+                        for channel, registers in channels.items()
+                    }
+                    for axis, channels in display.items()
+                }
+                for frequency, display in self.display_registers.items()
+            },
+            'values': [field_info.value for field_info in self.all_fields()],
+        }
+
+    def all_fields(self):
+        ''' Generator that yields Field_Info of every field of the loaded frequencies
+        '''
+        for display in self.display_registers.values():
+            for channels in display.values():
+                for registers in channels.values():
+                    for fields in registers.values():
+                        yield from fields.values()
+
+    @classmethod
+    def from_state(cls, state):
+        ''' Returns DVFS_Table from the state of another table without parsing it again
+        '''
+        table = cls()
+        table.index = table_index.Table_Index(*state['index'])
+        table.partitions = partition_cache.Partition_Cache(table.index.digest)
+        load_config(state['processor'])
+        table.processor = state['processor']
+        table.frequencies.extend(state['frequencies'])
+        table.training.update(state['training'])
+        table.bypass.update(state['bypass'])
+        table.cfg_dict.update(state['cfg_dict'])
+        table.register_mask.update(state['register_mask'])
+        for frequency, display in state['display'].items():
+            table.add_partition(frequency, {'training': state['training'][frequency],
+                                            'bypass': state['bypass'][frequency],
+                                            'display': display, 'cfg_dict': dict(), 'register_mask': dict()})
+        for field_info, value in zip(table.all_fields(), state['values']):
+            field_info.value = value
+        return table
+
+    def load_all(self, workers):
+        ''' Partitions every frequency block that has not been yet, fanning the blocks missing
+            from the partition cache out across a pool of worker processes
+            Parameters:
+                workers: maximum number of worker processes, blocks are partitioned in this
+                         process when less than 2
+        '''
+        pending = list()
+        for frequency in self.frequencies:
+            if frequency in self.display_registers or frequency in pending:
+                continue
+            partition = self.partitions.get(frequency)
+            if partition is not None:
+                self.add_partition(frequency, partition)
+            else:
+                pending.append(frequency)
+        if workers < 2 or len(pending) < 2:
+            for frequency in pending:
+                self.load_frequency(frequency)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = min(workers, len(pending))) as executor:
+            futures = [(frequency, executor.submit(partition_block, self.index.path, *self.index.block(frequency), self.processor))
+                       for frequency in pending]
+            # merged in table order so display_registers matches a sequential load
+            for frequency, future in futures:
+                partition = future.result()
+                self.partitions.put(frequency, partition)
+                self.add_partition(frequency, partition)
+
+    def load_frequency(self, frequency, dictionary = None):
+        ''' Partitions the block of frequency if it has not been yet, from the partition cache
+            when the table was loaded before, otherwise by seeking to and parsing the block
+            Parameters:
+                dictionary: registers and values of the block if already parsed
+        '''
+        if frequency in self.display_registers or self.index is None:
+            return
+        partition = self.partitions.get(frequency)
+        if partition is None:
+            if dictionary is None:
+                for frequency, dictionary in parse_blocks(self.index.read(frequency)):
+                    pass
+            partition = partition_frequency(dictionary)
+            self.partitions.put(frequency, partition)
+        self.add_partition(frequency, partition)
+
+    def axes(self):
+        ''' Returns tuple of axes of the loaded table's processor
+        '''
+        return axes
+
+    def bus_widths(self):
+        ''' Returns list of bus widths channels can be selected by
+        '''
+        return list(channel_select)
+
+    def channels(self, bits):
+        ''' Returns channels displayed for a bus width
+        '''
+        return channel_select[bits]
+
+    def add_partition(self, frequency, partition):
+        ''' Stores partition of a frequency block from partition_frequency, creating the
+            Field_Info of every field
+        '''
+        self.training[frequency] = partition['training']
+        self.bypass[frequency] = partition['bypass']
+        self.cfg_dict.update(partition['cfg_dict'])
+        self.register_mask.update(partition['register_mask'])
+        self.display_registers[frequency] = {
+            axis: {
+                channel: {
+                    register: {field: Field_Info(*info) for field, info in fields.items()}
+                    for register, fields in registers.items()
+                }
+                for channel, registers in channels.items()
+            }
+            for axis, channels in partition['display'].items()
+        }
+                            
+    def axis_rows(self, frequency, axis, channels = None):
+        ''' Returns tuple of Group_Counter and list of rows of the fields of the axis selected,
+            with a counter set on every field, raises Table_Error if the axis is not in frequency
+            Each row is a tuple of channel, register, field name, and Field_Info, channel and
+            register are empty strings when the same as the previous row
+            Parameters:
+                channels: channels to include, all channels if None
+        '''
+        axis, step, select = self.axis_selection(frequency, axis)
+        if (axis == "DQIVREF (training)") | (axis == "DQVREF (training)"):
+            group = VREF_Counter(step)
+        else:
+            group = Group_Counter(step)
+        if axis not in self.display_registers[frequency]:
+            raise Table_Error("Axis may be unnecessary for selected frequency")
+
+        rows = list()
+        previous = (None, None)
+        for channel, register, field, field_info in self.selected_fields(frequency, axis, select, channels):
+            if field_info.two:
+                counter = Two_Counter(field_info)
+            else:
+                counter = Counter(field_info)
+            group.add(counter)
+            field_info.set_counter(counter)
+            rows.append((channel if channel != previous[0] else "",
+                         register if (channel, register) != previous else "", field, field_info))
+            previous = (channel, register)
+        return group, rows
+
+    def axis_selection(self, frequency, axis):
+        ''' Returns tuple of name of axis in display_registers, step of its group buttons, and
+            selection of the fields changed by them, see selected_fields
+        '''
+        step = 1
+        if axis in self.bypass[frequency]:
+            if self.bypass[frequency][axis]:
+                step = 8
+
+        if axis == "CMDVREF":
+            select = ((0, 1), 2)
+        if axis in self.training[frequency]:
+            if self.training[frequency][axis]:
+                axis = axis + " (training)"
+                step = 1
+        if axis in counter_specific_fields:
+            select = counter_specific_fields[axis]
+        elif axis == "AutocaloffsetDQTerm":
+            select = ((2,), 4)
+            axis = "AutocaloffsetDQ/STerm"
+        elif axis == "AutocaloffsetDQSTerm":
+            select = ((0,), 4)
+            axis = "AutocaloffsetDQ/STerm"
+        else:
+            select = ((0,), 1)
+        return axis, step, select
+
+    def selected_fields(self, frequency, axis, select, channels = None):
+        ''' Generator that yields tuple of channel, register, field name, and Field_Info of the
+            fields of an axis changed by its group buttons, in display order
+            Parameters:
+                axis:       name of axis in display_registers
+                select:     tuple of positions and count, a field is selected when its position
+                            among the sorted fields of its register modulo count is in positions
+                channels:   channels to include, all channels if None
+        '''
+        for channel, registers in self.display_registers[frequency][axis].items():
+            if channels is None or channel in channels:
+                for register, fields in registers.items():
+                    for index, (field, field_info) in enumerate(sorted(fields.items())):
+                        if index % select[1] in select[0]:
+                            yield channel, register, field, field_info
+
+    def has_axis(self, frequency, axis):
+        ''' Returns whether the axis has registers in frequency
+        '''
+        self.load_frequency(frequency)
+        return self.check_axis(frequency, axis) in self.display_registers[frequency]
+
+    def fields(self, frequency, axis, channel = None):
+        ''' Generator that yields tuple of channel, register, field name, and Field_Info of
+            every field of an axis, the training registers when the axis uses training
+            Parameters:
+                channel: only yields fields of this channel if not None
+        '''
+        self.load_frequency(frequency)
+        axis = self.check_axis(frequency, axis)
+        for channel_name, registers in self.display_registers[frequency].get(axis, dict()).items():
+            if channel is None or channel_name == channel:
+                for register, fields in registers.items():
+                    for field, field_info in fields.items():
+                        yield channel_name, register, field, field_info
+
+    def step_axis(self, frequency, axis, steps, channels = None):
+        ''' Changes the fields of an axis by a number of steps as the group buttons of the GUI
+            do, with the step size of PI bypass and the sign of VREF training registers
+            Raises Table_Error if a value goes out of bounds, leaving the values unchanged
+            Parameters:
+                steps:      number of steps, negative to decrease
+                channels:   channels to change, all channels if None
+        '''
+        self.load_frequency(frequency)
+        group, rows = self.axis_rows(frequency, axis, channels)
+        group.change(steps)
+        try:
+            self.can_apply(frequency, axis)
+        except Table_Error:
+            self.clear(frequency, axis)
+            raise
+        self.apply(frequency, axis)
+
+    def step_frequencies(self, frequencies, axis, steps, channels = None):
+        ''' Changes the fields of an axis by a number of steps in many frequencies at once, as
+            step_axis does in each of them, through a Register_Matrix of the registers of the axis
+            in all frequencies when NumPy is installed
+            VREF training axes, whose sign and magnitude fields are stepped together, and every
+            axis without NumPy are stepped with step_axis one frequency at a time
+            Returns list of the frequencies without the axis, which are left unchanged
+            Raises Table_Error with the frequency if a value goes out of bounds, leaving the
+            values changed through the matrix unchanged
+            Parameters:
+                frequencies:    list of frequencies, without repeats
+                steps:          number of steps, negative to decrease
+                channels:       channels to change, all channels if None
+        '''
+        skipped = list()
+        selections = list()
+        for frequency in frequencies:
+            if not self.has_axis(frequency, axis):
+                skipped.append(frequency)
+                continue
+            display_axis, step, select = self.axis_selection(frequency, axis)
+            if register_matrix.np is None or display_axis in ("DQIVREF (training)", "DQVREF (training)"):
+                try:
+                    self.step_axis(frequency, axis, steps, channels)
+                except Table_Error as exception:
+                    raise Table_Error(f"{frequency} {axis}: {exception}") from None
+                continue
+            selections.append((frequency, steps * step, display_axis, list(self.selected_fields(frequency, display_axis, select, channels))))
+        if selections:
+            self.step_matrix(axis, selections)
+        return skipped
+
+    def step_matrix(self, axis, selections):
+        ''' Adds a change to the selected fields of every frequency through a Register_Matrix,
+            field by field across all registers and frequencies, see step_frequencies
+            Parameters:
+                selections: list of tuples of frequency, change, name of axis in display_registers,
+                            and list of selected_fields
+        '''
+        np = register_matrix.np
+        # columns are keyed by channel too, as a register can be displayed in several channels
+        rows = [{(channel, register): 0 for channel, register, field, field_info in fields}
+                for frequency, change, axis_name, fields in selections]
+        cells = dict()
+        for number, (frequency, change, axis_name, fields) in enumerate(selections):
+            # out of bounds fields are reported in the order can_apply checks them
+            order = {id(field_info): position for position, field_info in enumerate(
+                field_info for registers in self.display_registers[frequency][axis_name].values()
+                for register_fields in registers.values() for field_info in register_fields.values())}
+            for channel, register, field, field_info in fields:
+                rows[number][(channel, register)] |= field_info.value << field_info.lsb
+                cells.setdefault(field, list()).append((number, order[id(field_info)], (channel, register), field_info))
+        matrix = register_matrix.Register_Matrix([frequency for frequency, change, axis_name, fields in selections], rows)
+        changes = np.array([change for frequency, change, axis_name, fields in selections], dtype = np.int64)
+        updates = list()
+        outside = list()
+        for field, field_cells in cells.items():
+            layouts = dict()
+            for number, position, column, field_info in field_cells:
+                layouts.setdefault(column, (field_info.bits, field_info.two, field_info.lsb))
+            registers = list(layouts)
+            bits, twos, lsbs = (np.array(layout, dtype = np.int64) for layout in zip(*layouts.values()))
+            masks = ((1 << bits) - 1) << lsbs
+            selected = np.zeros((len(selections), len(registers)), dtype = bool)
+            places = {column: place for place, column in enumerate(registers)}
+            for number, position, column, field_info in field_cells:
+                selected[number, places[column]] = True
+            values = field_codec.sign_extend_all(matrix.extract(registers, masks, lsbs).astype(np.int64), bits, twos)
+            values = values + changes[:, None] * selected
+            minimums, maximums = field_codec.bounds_all(bits, twos)
+            for number, place in zip(*np.nonzero(selected & ((values < minimums) | (values > maximums)))):
+                outside.extend((number, position, field, field_info, int(values[number, place]))
+                               for cell_number, position, column, field_info in field_cells
+                               if cell_number == number and places[column] == place)
+            updates.append((registers, masks, lsbs, selected, values, field_cells, places))
+        if outside:
+            number, position, field, field_info, value = min(outside, key = lambda cell: cell[:2])
+            raise Table_Error(f"{selections[number][0]} {axis}: "
+                              + out_of_bounds(field, field_info, value, field_codec.clamp(value, field_info.bits, field_info.two)))
+        for registers, masks, lsbs, selected, values, field_cells, places in updates:
+            # unselected cells keep their bits, two's complement fields are encoded by the mask
+            matrix.insert(registers, masks, lsbs, np.where(selected, values, matrix.extract(registers, masks, lsbs)))
+        for registers, masks, lsbs, selected, values, field_cells, places in updates:
+            fields = matrix.extract(registers, masks, lsbs)
+            for number, position, column, field_info in field_cells:
+                field_info.value = int(fields[number, places[column]])
+
+    def change_field(self, frequency, axis, channel, register, field, delta):
+        ''' Adds delta to the value of a single field, in two's complement for signed fields
+            Raises Table_Error if the field does not exist or the value goes out of bounds
+        '''
+        self.load_frequency(frequency)
+        try:
+            field_info = self.display_registers[frequency][self.check_axis(frequency, axis)][channel][register][field]
+        except KeyError:
+            raise Table_Error(f"{field} of {register} not found for axis {axis} channel {channel}") from None
+        value = field_info.value
+        if field_info.two:
+            value = twos_complement_value(value, field_info.bits)
+        value += delta
+        if not within_bounds(value, field_info.bits, field_info.two):
+            raise Table_Error(out_of_bounds(field, field_info, value, field_codec.clamp(value, field_info.bits, field_info.two)))
+        field_info.value = twos_complement(value, field_info.bits)
+                        
+    def check_axis(self, frequency, axis):
+        if axis in self.training[frequency]:
+            if self.training[frequency][axis]:
+                axis = axis + " (training)"
+        elif (axis == "AutocaloffsetDQTerm") | (axis == "AutocaloffsetDQSTerm"):
+            axis = "AutocaloffsetDQ/STerm"
+        return axis
+                
+    def pending(self, frequency, axis):
+        ''' Returns list of tuples of field name and Field_Info for fields of axis with a counter
+        '''
+        return [(field, field_info)
+                for channel in self.display_registers[frequency][axis].values()
+                for fields in channel.values()
+                for field, field_info in fields.items() if field_info.counter is not None]
+
+    def can_apply(self, frequency, axis):
+        ''' Checks if the intended modification of all values are within bounds
+            of field's bit length, validating every pending change of the axis at once
+            Returns None if the axis is not in frequency, raises Table_Error if out of bounds,
+            giving the value the first field out of bounds would be clamped to
+        '''
+        axis = self.check_axis(frequency, axis)
+        try:
+            self.display_registers[frequency][axis]
+        except KeyError:
+            return 
+        pending = self.pending(frequency, axis)
+        changes = [field_info.counter.get_change() for field, field_info in pending]
+        outside = field_codec.out_of_bounds_all(changes,
+                                                [field_info.bits for field, field_info in pending],
+                                                [field_info.two for field, field_info in pending])
+        if outside:
+            values = [changes[index] for index in outside]
+            limits = field_codec.clamp_all(values, [pending[index][1].bits for index in outside],
+                                           [pending[index][1].two for index in outside])
+            field, field_info = pending[outside[0]]
+            raise Table_Error(out_of_bounds(field, field_info, values[0], limits[0]))
+        return True
+                    
+    def apply(self, frequency, axis):
+        ''' Applies the changes to the values, encoding every pending change of the axis at once
+        '''
+        axis = self.check_axis(frequency, axis)
+        pending = self.pending(frequency, axis)
+        new_values = field_codec.encode_all([field_info.counter.get_change() for field, field_info in pending],
+                                            [field_info.bits for field, field_info in pending])
+        for (field, field_info), new_value in zip(pending, new_values):
+            field_info.counter.reset_value()
+            field_info.value = new_value
+            field_info.remove_counter()
+
+    def clear(self, frequency, axis):
+        ''' Clears the counter values
+        '''
+        axis = self.check_axis(frequency, axis)
+        if axis not in self.display_registers[frequency]:
+            return
+        for channel in self.display_registers[frequency][axis]:
+            for register in self.display_registers[frequency][axis][channel]: 
+                for field, field_info in self.display_registers[frequency][axis][channel][register].items():
+                    if field_info.counter is not None:
+                        self.display_registers[frequency][axis][channel][register][field].remove_counter()
+                
+    def export(self, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, progress = None, cancel = None):
+        ''' Prints new DVFS file with modifications, writing the DVFS, derated, and cfg files
+            concurrently on a pool of threads
+            Returns list of messages of the derated and cfg files that could not be exported,
+            empty when every file was exported, raises Table_Error if the DVFS table could not
+            Parameters:
+                inputfilepath: path to DVFS table text file
+                outputfilepath: path to output directory otherwise empty string
+                deratedfile: path to derated file
+                cfgfile: path to cfg file, or to directory whose cfg files are all exported
+                addendum: string to attach at end of original file name for new table
+                progress: see submit_export
+                cancel: see submit_export
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers = 3) as executor:
+            writers = self.submit_export(executor, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, progress, cancel)
+        return self.finish_export(writers)
+
+    def submit_export(self, executor, inputfilepath, outputfilepath, deratedfile, cfgfile, addendum, progress = None, cancel = None):
+        ''' Starts writing the DVFS, derated, and cfg files on executor, the edits of the DVFS
+            table are taken when called so the table can be changed while the files are written
+            Returns list of tuples of name and Future of each file, see finish_export
+            Parameters:
+                executor:   concurrent.futures executor to run the writers on
+                progress:   function called from the writers with name of file, number of frequency
+                            blocks written, and number of blocks of file, None for no progress
+                cancel:     threading.Event which stops the writers when set, None if not cancellable
+        '''
+        patches = {frequency: self.patch_map(frequency) for frequency in self.display_registers}
+        # a table loaded while the files are written replaces the index and frequencies
+        loaded = (self.index, list(self.frequencies))
+        writers = [("DVFS table", executor.submit(self.export_dvfs_file, inputfilepath, inputfilepath, outputfilepath,
+                                                  addendum, patches, progress, cancel, loaded))]
+        self.rebase = None
+        if self.index is not None and same_path(output_path(inputfilepath, outputfilepath, addendum, ".txt"), self.index.path):
+            self.rebase = (writers[0][1], self.index, [(field_info, field_info.value) for field_info in self.all_fields()])
+        if deratedfile:
+            writers.append(("derated", executor.submit(self.export_dvfs_file, deratedfile, inputfilepath, outputfilepath,
+                                                       addendum, patches, progress, cancel, loaded)))
+        if cfgfile:
+            cfgs = list()
+            for path in cfg_files(cfgfile):
+                cfg = cfg_file.Cfg_File(path)
+                if cfg.frequency in self.frequencies:
+                    self.load_frequency(cfg.frequency)
+                cfgs.append((cfg, output_path(path, outputfilepath, addendum, ".cfg")))
+            registers = {frequency: self.register_bits(frequency) for frequency in self.display_registers}
+            writers.append(("cfg", executor.submit(self.export_cfgs, cfgs, registers, progress, cancel)))
+        return writers
+
+    def finish_export(self, writers):
+        ''' Returns list of messages of the derated and cfg files that could not be exported,
+            waiting for every writer, raises Table_Error if the DVFS table could not be exported
+            When the loaded table was overwritten, the exported values become the original values
+            of the fields and the table is indexed again, so the next export also patches the
+            registers whose edits were reverted since
+            Parameters:
+                writers: list of tuples of name and Future of each file from submit_export
+        '''
+        rebase, self.rebase = self.rebase, None
+        problems = export_problems(writers)
+        if rebase is None or rebase[0] is not writers[0][1] or rebase[1] is not self.index:
+            return problems
+        for field_info, value in rebase[2]:
+            field_info.original = value
+        self.index = load_index(self.index.path)
+        self.partitions = partition_cache.Partition_Cache(self.index.digest)
+        self.partitions.set_version(globals().get('config_version'))
+        return problems
+
+    def export_cfgs(self, cfgs, registers, progress = None, cancel = None):
+        ''' Writes new cfg files with modifications, each with the registers of its own frequency
+            Returns list of messages of problems with the cfg files
+            Parameters:
+                cfgs:       list of tuples of Cfg_File and path to write it to
+                registers:  dict with frequency as key and its register_bits as value
+                progress:   see submit_export
+                cancel:     see submit_export
+        '''
+        problems = list()
+        for done, (cfg, cfgpath) in enumerate(cfgs):
+            if cancel is not None and cancel.is_set():
+                raise Table_Error("Export cancelled")
+            if progress is not None:
+                progress("cfg", done, len(cfgs))
+            name = cfg.path.rsplit("/", 1)[-1]
+            try:
+                problems.extend(f"{name}: {problem}" for problem in self.export_cfg(cfg, cfgpath, registers))
+            except OSError as exception:
+                problems.append(f"{name}: {exception}")
+        if progress is not None:
+            progress("cfg", len(cfgs), len(cfgs))
+        return problems
+
+    def export_cfg(self, cfg, cfgpath, registers):
+        ''' Writes new cfg file with the register values of the frequency in its header
+            Returns list of messages of problems with the cfg
+            Parameters:
+                cfg:        Cfg_File to export
+                cfgpath:    path to write new cfg file to
+                registers:  dict with frequency as key and its register_bits as value
+        '''
+        if cfg.frequency is None:
+            return ["Cfg frequency not matched, cfg file will not be updated"]
+        if cfg.frequency not in registers:
+            return [f"Frequency {cfg.frequency} not found in DVFS table, cfg file will not be updated"]
+        bits = registers[cfg.frequency]
+        for name, parameters in cfg.parameters.items():
+            for parameter in parameters:
+                if parameter.address in MRW_REGISTERS:
+                    register_name = MRW_REGISTERS[parameter.address]
+                    mask = 0xffff0000  # remove DEV_SELECTN
+                elif name in self.cfg_dict:
+                    axis, channel, register_name = self.cfg_dict[name]
+                    mask = self.register_mask[register_name]
+                else:
+                    continue
+                if register_name in bits:
+                    cfg.set_value(parameter, (parameter.value & mask) | (bits[register_name] & (0xFFFFFFFF - mask)))
+        cfg.write(cfgpath, self.store)
+        return list()
+
+    def export_dvfs_file(self, file, inpath, outpath, addendum, patches = None, progress = None, cancel = None, loaded = None):
+        ''' Method to create new table for DVFS and derated because of text format similarity
+            Only the values of edited registers are written from the patches, every other byte
+            is copied verbatim from a memory map of the original file
+            Raises Table_Error if a frequency of file is not in the DVFS table or export is cancelled
+            Parameters:
+                patches:    dict with frequency as key and its patch_map as value, taken from
+                            the table if None
+                progress:   see submit_export
+                cancel:     see submit_export
+                loaded:     tuple of Table_Index and list of frequencies of the DVFS table the
+                            patches were taken from, those of the table if None
+        '''
+        path = output_path(file, outpath, addendum, ".txt")
+        loaded_index, frequencies = loaded if loaded is not None else (self.index, self.frequencies)
+        if loaded_index is not None and file == loaded_index.path and os.path.getsize(file) == loaded_index.size:
+            index = loaded_index
+        else:
+            index = load_index(file)
+        for frequency in index.frequencies():
+            if frequency not in frequencies:
+                raise Table_Error(f"{frequency}Hz in derated not found in DVFS table")
+        if patches is None:
+            patches = {frequency: self.patch_map(frequency) for frequency in self.display_registers}
+        name = "DVFS table" if file == inpath else "derated"
+        write_patched(index, path, patches, self.store, name, progress, cancel)
+        return True
+
+    def patch_map(self, frequency):
+        ''' Returns dict with DVFS register name as key, and tuple of the bits set by its fields
+            and the bitmask of bits to keep from the table as value, for the registers of frequency
+            with an edited field, re-packing them all in one field_engine call
+            A register displayed in several axes or channels is patched from the first one
+        '''
+        registers = dict()
+        for axis in self.display_registers.get(frequency, dict()).values():
+            for channel in axis.values():
+                for register_name, field_values in channel.items():
+                    registers.setdefault(register_name, field_values)
+        edited = [(register_name, field_values) for register_name, field_values in registers.items()
+                  if any(field_info.value != field_info.original for field_info in field_values.values())]
+        keep_masks = [self.register_mask[register_name] for register_name, field_values in edited]
+        set_bits = field_engine.pack_registers(
+            [0] * len(edited),
+            [[field_info.value for field_info in field_values.values()] for register_name, field_values in edited],
+            [[field_info.lsb for field_info in field_values.values()] for register_name, field_values in edited],
+            keep_masks)
+        return {register_name: (bits, mask)
+                for (register_name, field_values), bits, mask in zip(edited, set_bits, keep_masks)}
+
+    def register_bits(self, frequency):
+        ''' Returns dict with DVFS register name as key, and the bits set by its current field
+            values as value, for every register of frequency
+            A register displayed in several axes or channels is taken from the first one
+        '''
+        registers = dict()
+        for axis in self.display_registers.get(frequency, dict()).values():
+            for channel in axis.values():
+                for register_name, field_values in channel.items():
+                    registers.setdefault(register_name, field_values)
+        set_bits = field_engine.pack_registers(
+            [0] * len(registers),
+            [[field_info.value for field_info in field_values.values()] for field_values in registers.values()],
+            [[field_info.lsb for field_info in field_values.values()] for field_values in registers.values()],
+            [0] * len(registers))
+        return dict(zip(registers, set_bits))
+
+def write_patched(index, path, patches, store = None, name = "DVFS table", progress = None, cancel = None):
+    ''' Writes the table of index to path with the values of the registers in patches replaced,
+        every other byte is copied verbatim from a memory map of the table
+        Raises Table_Error if cancelled
+        Parameters:
+            index:      Table_Index of DVFS or derated table
+            path:       path to write the table to
+            patches:    dict with frequency as key and its patch_map as value
+            store:      Content_Store to write through, None to write directly
+            name:       name of the table given to progress
+            progress:   see DVFS_Table.submit_export
+            cancel:     see DVFS_Table.submit_export
+    '''
+    # the map is closed before the output replaces the file when overwriting it
+    with output_file.Output_File(path, store = store) as out_file, open(index.path, 'rb') as in_file:
+        mapped = mmap.mmap(in_file.fileno(), 0, access = mmap.ACCESS_READ) if index.size else memoryview(b"")
+        with mapped, memoryview(mapped) as contents:
+            position = 0
+            for done, (frequency, start, end) in enumerate(index.blocks):
+                if cancel is not None and cancel.is_set():
+                    raise Table_Error("Export cancelled")
+                if progress is not None:
+                    progress(name, done, len(index.blocks))
+                for value_start, value_end, value in patch_values(contents, index.values[done], patches.get(frequency)):
+                    out_file.write(contents[position:value_start])
+                    out_file.write(value)
+                    position = value_end
+            out_file.write(contents[position:])
+    if progress is not None:
+        progress(name, len(index.blocks), len(index.blocks))
+
+def patch_values(contents, values, patches):
+    ''' Generator that yields tuple of start and end offset, and new text of every value of a
+        frequency block changed by patches, in file order
+        Parameters:
+            contents:   memoryview of DVFS or derated table
+            values:     dict of register name to offsets of its values in the block, see Table_Index
+            patches:    patch_map of the frequency of the block
+    '''
+    if not patches:
+        return
+    spans = sorted((start, end, patches[register_name]) for register_name in patches.keys() & values.keys()
+                   for start, end in values[register_name])
+    for start, end, (set_bits, mask) in spans:
+        new_value = (int(bytes(contents[start:end]), 16) & mask) | set_bits
+        yield start, end, f"{new_value:#0{10}x}".encode(table_index.ENCODING)
+
+def out_of_bounds(field, field_info, value, limit):
+    ''' Returns message of a field value out of the range of the field, with the limit it
+        would be clamped to
+    '''
+    return f"Out of bounds, {field_info.bits:d}-bit number for {field}, {value:d} past limit {limit:d}"
+
+def export_problems(writers):
+    ''' Returns list of messages of the derated and cfg files that could not be exported,
+        waiting for every writer, raises Table_Error if the DVFS table could not be exported
+        Parameters:
+            writers: list of tuples of name and Future of each file from submit_export
+    '''
+    problems = list()
+    for name, future in writers:
+        try:
+            result = future.result()
+        except Table_Error as exception:
+            if name == "DVFS table":
+                raise
+            problems.append(str(exception))
+        else:
+            if name == "cfg":
+                problems.extend(result)
+    return problems
+
+def cfg_files(path):
+    ''' Returns list of paths of the cfg files of a directory in name order, or list of path
+        if it is a file
+    '''
+    if not os.path.isdir(path):
+        return [path]
+    return [f"{path.rstrip('/')}/{name}" for name in sorted(os.listdir(path)) if name.lower().endswith(".cfg")]
+
+def same_path(path, other):
+    ''' Returns whether two paths name the same file, whether or not it exists
+    '''
+    return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(other))
+
+def output_path(file, outpath, addendum, extension):
+    ''' Returns path of the exported version of a file, beside it if outpath is empty
+        Parameters:
+            file:       path to input file with forward slashes
+            outpath:    path to output directory otherwise empty string
+            addendum:   string to attach at end of original file name
+            extension:  extension of exported file
+    '''
+    if not outpath:
+        name = file.rsplit(".", 1)[0]
+        return name + addendum + extension
+    name = file.rsplit("/", 1)[1].rsplit(".", 1)[0]
+    return outpath + "/" + name + addendum + extension
+
+def parse_blocks(in_file):
+    ''' Generator that yields tuple of frequency and dict of register name to value
+        for each frequency block of a DVFS table as soon as the block has been read
+        Parameters:
+            in_file: DVFS table text file opened for reading
+    '''
+    dictionary = dict()
+    for line in in_file:
+        line_list = line.split(',')
+        if len(line_list) > 1:
+            value = line_list[0].lstrip()
+            register = line_list[1]
+            if not register.isspace():
+                register = register.strip('/* \n')
+                dictionary[register] = value
+                if register == "PLLHUB_ENABLE_FREQ_CHANGE":    # register near end of table
+                    yield dictionary["SDRAM frequency khz"], dictionary
+                    dictionary = dict()
+
+def find_processor(dictionary):
+    ''' Returns processor whose unique register in config list exists in the frequency block,
+        or None if not recognized
+    '''
+    processor = None
+    for tegra, register in processor_register.items():
+        if register in dictionary:
+            processor = tegra
+    return processor
+
+def table_config(path):
+    ''' Imports the config of the processor of a DVFS table, detected from its first frequency
+        block, see load_config
+        Returns tuple of processor and dict of registers and values of the first block
+        Raises Table_Error if the table has no frequency block or its processor is not supported
+    '''
+    with open(path, 'rt', encoding = table_index.ENCODING) as in_file:
+        for frequency, dictionary in parse_blocks(in_file):
+            break
+        else:
+            raise Table_Error("Invalid file")
+    processor = find_processor(dictionary)
+    if processor is None:
+        raise Table_Error("Processor of DVFS table not recognized")
+    try:
+        load_config(processor)
+    except ModuleNotFoundError:
+        raise Table_Error("config" + processor + " not supported") from None
+    return processor, dictionary
+
+def load_index(path):
+    ''' Returns Table_Index of a DVFS or derated table with the value offsets of the registers
+        displayed by the loaded config, see table_index
+    '''
+    return table_index.load_index(path, display_matcher.combined)
+
+def load_config(processor):
+    ''' Imports config file and aremc contents of processor into module namespace
+        Raises ModuleNotFoundError if processor has no config file
+    '''
+    my_module = importlib.import_module("config" + processor)
+    module_dict = my_module.__dict__
+    try:
+        to_import = my_module.__all__
+    except AttributeError:
+        to_import = [name for name in module_dict if not name.startswith('_')]
+    globals().update({name: module_dict[name] for name in to_import})
+
+def partition_frequency(dictionary):
+    ''' Returns partition of a frequency block as dict of plain values which can be cached or
+        sent between processes:
+            training:       dict with axis key and whether the axis uses training registers
+            bypass:         dict with axis key and whether the axis has PI Bypass enabled
+            display:        tree of axis, channel, register, field with tuple of value, bits,
+                            two's complement, and lsb of the field
+            cfg_dict:       cfg_dict entries of the registers in block
+            register_mask:  register_mask entries of the registers in block
+        Parameters:
+            dictionary: Dictionary of registers and their values for a single frequency
+    '''
+    display_registers = dict()
+    cfg_dict = dict()
+    register_mask = dict()
+    bit_partition(dictionary, cfg_dict, display_registers, register_mask)
+    return {
+        'training': frequency_training(dictionary),
+        'bypass': frequency_bypass(dictionary),
+        'display': display_registers,
+        'cfg_dict': cfg_dict,
+        'register_mask': register_mask,
+    }
+
+def partition_block(path, start, end, processor):
+    ''' Returns partition_frequency of the block between byte offsets of a DVFS table,
+        run in worker processes of DVFS_Table.load_all
+    '''
+    load_config(processor)
+    for frequency, dictionary in parse_blocks(table_index.read_block(path, start, end)):
+        return partition_frequency(dictionary)
+
+def frequency_training(dictionary):
+    ''' Returns dict with axis key which stores whether the axis needs training for the frequency
+    '''
+    training = dict()
+    needs_training = dictionary["needs_training"]
+    write_byte_training = separate_bits(4, 4, needs_training)
+    write_vref_training = separate_bits(5, 5, needs_training)
+    read_byte_training = separate_bits(6, 6, needs_training)
+    read_vref_training = separate_bits(7, 7, needs_training)
+    write_leveling = separate_bits(10, 10, needs_training)
+    training["OBDQ"] = True if write_byte_training else False
+    training["DQVREF"] = True if write_vref_training else False
+    training["RDQS"] = True if read_byte_training else False
+    training["DQIVREF"] = True if read_vref_training else False
+    training["WCKDQ"] = True if write_leveling else False
+    return training
+
+def frequency_bypass(dictionary):
+    ''' Returns dict with axis key which stores whether the axis has PI_BYPASS enabled for the
+        frequency so step size will be 8 instead
+    '''
+    bypass = dict()
+    needs_bypass = dictionary["EMC_PMACRO_DDLL_BYPASS_0"]
+    
+    #if processor != "T186":
+    OBCLK_bypass = separate_bits(25, 25, needs_bypass)
+    OBCMD1t_bypass = separate_bits(24, 24, needs_bypass)
+    WCKDQ_bypass = separate_bits(19, 19, needs_bypass)
+    RDQS_bypass = separate_bits(10, 10, needs_bypass)
+    OBDQS_bypass = separate_bits(9, 9, needs_bypass)
+    OBDQ_bypass = separate_bits(8, 8, needs_bypass)
+
+    #else:                
+    #    OBCLK_bypass = separate_bits(17, 17, needs_bypass)
+    #    OBCMD1t_bypass = separate_bits(16, 16, needs_bypass)
+    #    RDQS_bypass = separate_bits(2, 2, needs_bypass)
+    #    OBDQS_bypass = separate_bits(1, 1, needs_bypass)
+    #    OBDQ_bypass = separate_bits(0, 0, needs_bypass)
+    bypass["OBCLK"] = True if OBCLK_bypass else False
+    bypass["OBCMD1t"] = True if OBCMD1t_bypass else False
+    bypass["WCKDQ"] = True if WCKDQ_bypass else False
+    bypass["RDQS"] = True if RDQS_bypass else False
+    bypass["OBDQS"] = True if OBDQS_bypass else False
+    bypass["OBDQ"] = True if OBDQ_bypass else False
+    return bypass
+
+def bit_partition(dictionary, cfg_dict, display_registers, register_mask):
+    ''' uses registers_to_display list in config file to parse DVFS table into dictionaries
+        Register names are classified against every entry in a single pass by display_matcher
+        and the fields of all matched registers are extracted in one field_engine call
+    '''
+    matches = display_matcher.classify(dictionary)
+    entries = list()
+    values = list()
+    layouts = list()
+    for (register, aremc_name, cfg_name, axis, twos_complement), matched_registers in zip(registers_to_display, matches):
+        for specific_register, register_value, register_name, cfg, channel in matched_registers:
+            space = 'R0' if specific_register == 'R0_DRAM_MR12' else 'EMC'
+            values.append(int(register_value, 16))
+            layouts.append(field_engine.layout(register_specs.get(space, register_name), twos_complement))
+        entries.append((matched_registers, axis))
+    fields = iter(zip(layouts, field_engine.extract_fields(values, layouts)))
+    for matched_registers, axis in entries:
+        partition_register(matched_registers, fields, cfg_dict, display_registers, register_mask, axis)
+
+    
+def partition_register(matched_registers, fields, cfg_dict, display_registers, register_mask, axis):
+    ''' Stores registers matched to a registers_to_display entry into dictionary
+        using information from aremc file
+        
+        Parameters:
+            matched_registers:  List of tuples of DVFS register name, register value, aremc name,
+                                cfg name, and channel from display_matcher for a single frequency
+            fields:             Iterator with a tuple of Field_Layout and extracted field values
+                                for each matched register
+            display_registers:  Dictionary of already parsed values stored in through axis, channel, register,
+                                field as tuple of value, bits, two's complement, and lsb
+            register_mask:      Dictionary to store mask for each register
+            axis:               Axis the register belongs to
+    '''  
+    if axis not in display_registers:
+        display_registers[axis] = dict()
+
+    for (specific_register, register_value, register_name, cfg, channel_display), (layout, values) in zip(matched_registers, fields):
+        if channel_display not in display_registers[axis]:
+            display_registers[axis][channel_display] = dict()
+        #       stores key info in cfg dict for easier lookup when retrieving corresponding register value in DVFS
+        cfg_dict[cfg] = (axis, channel_display, specific_register)
+
+        if specific_register not in display_registers[axis][channel_display]:
+            register_mask[specific_register] = 0xFFFFFFFF - layout.write_mask
+            display_registers[axis][channel_display][specific_register] = dict()
+
+        display_registers[axis][channel_display][specific_register].update(
+            zip(layout.names, zip(values, layout.widths, (layout.signed,) * len(layout), layout.shifts)))
+        
+def separate_bits(start, end, number):
+    ''' Returns a binary number specified by its msb and lsb extracted from a larger number
+        Used to extract field value from a register value
+        Parameters:
+            start:  msb of binary number to return
+            end:    lsb of binary number to return
+            number: overall number to extract specific bits from
+    '''
+    number = int(number, 16) >> end
+    exp = start-end+1
+    mask = (2**exp) - 1
+    number = number & mask
+    return number
+
+# integer two's complement and bounds helpers of field values
+twos_complement_value = field_codec.sign_extend
+twos_complement = field_codec.encode
+within_bounds = field_codec.within_bounds
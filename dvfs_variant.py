@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Delta-encoded variants of a DVFS table
+
+Description:
+A variant stores only the registers whose value differs from its base DVFS table, as
+(frequency, register, new value) deltas, with the sha256 digest of the base table so it
+is never applied to another table. A variant is a few hundred bytes where the full
+table is hundreds of kilobytes, and the full table is materialized on demand through
+the same patch path as an export, splicing the new values into the base table.
+
+Variant is a JSON file:
+    {
+        "version":  1,
+        "base":     "table.txt",        base DVFS table, relative to the variant
+        "digest":   "5f2c...",          sha256 of the base table
+        "deltas":   [["665600", "EMC_PMACRO_IB_VREF_DQ_0_0_CH0", "0x1d1d1d1d"], ...]
+    }
+"""
+import json
+import os
+import dvfs_table
+import output_file
+from dvfs_table import Table_Error
+
+# Bumped whenever the layout of variant files changes
+VERSION = 1
+EXTENSION = ".dvfsvar"
+
+
+def variant_deltas(table):
+    ''' Returns list of [frequency, register, new value] of every register whose value in the
+        edited DVFS_Table differs from its base table, in table order
+    '''
+    index = table.index
+    with open(index.path, 'rb') as table_file:
+        contents = table_file.read()
+    deltas = list()
+    for frequency in table.display_registers:
+        patches = table.patch_map(frequency)
+        if not patches:
+            continue
+        # the fields of a repeated frequency or register are loaded from its last occurrence
+        values = index.values[max(number for number, block in enumerate(index.blocks) if block[0] == frequency)]
+        for register_name, (set_bits, mask) in patches.items():
+            if register_name not in values:
+                continue
+            start, end = values[register_name][-1]
+            value = int(contents[start:end], 16)
+            new_value = (value & mask) | set_bits
+            if new_value != value:
+                deltas.append([frequency, register_name, f"{new_value:#0{10}x}"])
+    return deltas
+
+
+def save_variant(table, path):
+    ''' Writes the edits of a DVFS_Table as a variant of its base table
+        Returns number of deltas written
+    '''
+    if table.index is None:
+        raise Table_Error("No DVFS table loaded")
+    base = table.index.path
+    try:
+        base = os.path.relpath(base, os.path.dirname(os.path.abspath(path)))
+    except ValueError:
+        # base on another drive
+        pass
+    deltas = variant_deltas(table)
+    with output_file.Output_File(path, 'wt') as variant_file:
+        json.dump({"version": VERSION, "base": base.replace(os.sep, "/"), "digest": table.index.digest,
+                   "deltas": deltas}, variant_file, separators = (",", ":"))
+    return len(deltas)
+
+
+def load_variant(path):
+    ''' Returns variant read from path, raises Table_Error if it is invalid
+    '''
+    try:
+        with open(path, 'rt') as variant_file:
+            variant = json.load(variant_file)
+    except ValueError as exception:
+        raise Table_Error(f"Invalid variant {path}: {exception}") from None
+    if not isinstance(variant, dict) or variant.get("version") != VERSION:
+        raise Table_Error(f"Variant {path} not supported")
+    if not all(key in variant for key in ("base", "digest", "deltas")):
+        raise Table_Error(f"Invalid variant {path}")
+    try:
+        variant["deltas"] = [(str(frequency), register_name, int(value, 16))
+                             for frequency, register_name, value in variant["deltas"]]
+    except (TypeError, ValueError):
+        raise Table_Error(f"Invalid deltas in variant {path}") from None
+    return variant
+
+
+def base_path(variant, path):
+    ''' Returns path of the base table of a variant read from path, with forward slashes
+    '''
+    base = os.path.join(os.path.dirname(os.path.abspath(path)), variant["base"])
+    return os.path.normpath(base).replace(os.sep, "/")
+
+
+def base_index(variant, path):
+    ''' Returns Table_Index of the base table of a variant, raises Table_Error if the base
+        table is not the one the variant was made from
+    '''
+    base = base_path(variant, path)
+    try:
+        # the config of the base table selects the registers whose values are indexed
+        dvfs_table.table_config(base)
+        index = dvfs_table.load_index(base)
+    except OSError:
+        raise Table_Error(f"Base table {base} of variant not found") from None
+    if index.digest != variant["digest"]:
+        raise Table_Error(f"Base table {base} has changed since the variant was made")
+    return index
+
+
+def materialize(path, output, store = None):
+    ''' Writes the full DVFS table of the variant at path to output, without parsing the base
+        table, raises Table_Error if the base table has changed or lacks a delta's register
+        Parameters:
+            path:   path to variant
+            output: path to write the DVFS table to
+            store:  Content_Store to write through, None to write directly
+    '''
+    variant = load_variant(path)
+    index = base_index(variant, path)
+    frequencies = set(index.frequencies())
+    patches = dict()
+    for frequency, register_name, value in variant["deltas"]:
+        if frequency not in frequencies:
+            raise Table_Error(f"{frequency} not found in base table")
+        # keeps no bits of the base value
+        patches.setdefault(frequency, dict())[register_name] = (value, 0)
+    for number, (frequency, start, end) in enumerate(index.blocks):
+        for register_name in patches.get(frequency, dict()):
+            if register_name not in index.values[number]:
+                raise Table_Error(f"{register_name} not found in {frequency} of base table")
+    dvfs_table.write_patched(index, output, patches, store)
+
+
+def open_variant(table, path, workers = None):
+    ''' Parses the base table of a variant into a DVFS_Table and sets the fields of every
+        register of the deltas, so they show as edits of the base table
+        Returns processor of the table, raises Table_Error if the variant cannot be applied
+        Parameters:
+            table:      DVFS_Table to load the variant in
+            path:       path to variant
+            workers:    see DVFS_Table.parse_file
+    '''
+    variant = load_variant(path)
+    base = base_path(variant, path)
+    try:
+        processor = table.parse_file(base, workers)
+    except OSError:
+        raise Table_Error(f"Base table {base} of variant not found") from None
+    if table.index.digest != variant["digest"]:
+        raise Table_Error(f"Base table {base} has changed since the variant was made")
+    for frequency, register_name, value in variant["deltas"]:
+        if frequency not in table.frequencies:
+            raise Table_Error(f"{frequency} not found in base table")
+        table.load_frequency(frequency)
+        found = False
+        for channels in table.display_registers[frequency].values():
+            for registers in channels.values():
+                for field_info in registers.get(register_name, dict()).values():
+                    field_info.value = (value >> field_info.lsb) & ((1 << field_info.bits) - 1)
+                    found = True
+        if not found:
+            raise Table_Error(f"{register_name} of {frequency} is not displayed")
+    return processor
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Integer codec of signed and unsigned register field values
+
+Description:
+Sign-extends, encodes, clamps, and bounds checks field values with integer
+arithmetic on the field width, instead of going through binary strings. The
+*_all variants take sequences of values with the bits and two's complement flag of
+each field, so all pending changes of an axis or a whole table are validated and
+encoded in one call, using NumPy when it is installed and the batch is large.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of values below which the Python path is faster than converting to NumPy
+NUMPY_THRESHOLD = 2048
+
+
+def field_range(bits, two):
+    ''' Returns tuple of minimum and maximum value of a field
+        Parameters:
+            bits:   number of bits
+            two:    whether two's complement
+    '''
+    if two:
+        return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+    return 0, (1 << bits) - 1
+
+
+def sign_extend(value, bits):
+    ''' Returns the decimal value of a two's complement number
+        Parameters:
+            value: two's complement number
+            bits: number of bits in number
+    '''
+    if value & (1 << (bits - 1)):
+        return value - (1 << bits)
+    return value
+
+
+def encode(value, bits):
+    ''' Returns two's complement form of a decimal number, non-negative numbers are unchanged
+        Parameters:
+            value: decimal value
+            bits: number of bits
+    '''
+    if value < 0:
+        return value & ((1 << bits) - 1)
+    return value
+
+
+def clamp(value, bits, two):
+    ''' Returns value limited to the range of the field
+    '''
+    minimum, maximum = field_range(bits, two)
+    return min(max(value, minimum), maximum)
+
+
+def within_bounds(value, bits, two):
+    ''' Returns a boolean on whether the number is within bounds of bit length
+        Parameters:
+            value:  decimal value
+            bits:   number of bits
+            two:    whether two's complement
+    '''
+    minimum, maximum = field_range(bits, two)
+    return minimum <= value <= maximum
+
+
+def bounds_all(bits, twos):
+    ''' Returns lists of minimum and maximum value of each field
+    '''
+    minimums = [-(1 << (width - 1)) if two else 0 for width, two in zip(bits, twos)]
+    maximums = [(1 << (width - 1)) - 1 if two else (1 << width) - 1 for width, two in zip(bits, twos)]
+    return minimums, maximums
+
+
+def out_of_bounds_all(values, bits, twos):
+    ''' Returns list of indices of the values outside the range of their field
+        Parameters:
+            values: sequence of decimal values
+            bits:   sequence of number of bits of each field
+            twos:   sequence of whether each field is two's complement
+    '''
+    minimums, maximums = bounds_all(bits, twos)
+    if np is not None and len(values) >= NUMPY_THRESHOLD:
+        values = np.asarray(values, dtype = np.int64)
+        outside = (values < np.asarray(minimums, dtype = np.int64)) | (values > np.asarray(maximums, dtype = np.int64))
+        return np.flatnonzero(outside).tolist()
+    return [index for index, (value, minimum, maximum) in enumerate(zip(values, minimums, maximums))
+            if value < minimum or value > maximum]
+
+
+def clamp_all(values, bits, twos):
+    ''' Returns list of values limited to the range of their field
+    '''
+    minimums, maximums = bounds_all(bits, twos)
+    if np is not None and len(values) >= NUMPY_THRESHOLD:
+        return np.clip(np.asarray(values, dtype = np.int64), minimums, maximums).tolist()
+    return [min(max(value, minimum), maximum) for value, minimum, maximum in zip(values, minimums, maximums)]
+
+
+def encode_all(values, bits):
+    ''' Returns list of two's complement forms of decimal values
+    '''
+    if np is not None and len(values) >= NUMPY_THRESHOLD:
+        masks = (np.ones(len(bits), dtype = np.int64) << np.asarray(bits, dtype = np.int64)) - 1
+        values = np.asarray(values, dtype = np.int64)
+        return np.where(values < 0, values & masks, values).tolist()
+    return [value & ((1 << width) - 1) if value < 0 else value for value, width in zip(values, bits)]
+
+
+def sign_extend_all(values, bits, twos):
+    ''' Returns list of decimal values of fields, sign-extending the two's complement fields
+        A NumPy array of values is returned as an array, with bits and twos broadcast to it
+    '''
+    if np is not None and isinstance(values, np.ndarray):
+        bits = np.asarray(bits, dtype = np.int64)
+        negative = np.asarray(twos, dtype = bool) & ((values >> (bits - 1)) & 1).astype(bool)
+        return np.where(negative, values - (np.int64(1) << bits), values)
+    return [value - (1 << width) if two and value >> (width - 1) else value
+            for value, width, two in zip(values, bits, twos)]
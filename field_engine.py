@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Batched field extraction and register re-packing
+
+Description:
+Decodes the fields of many registers, and re-assembles many registers from edited
+field values, in a single call over flat arrays of the precomputed (mask, shift,
+width, signed) of every field. Loading a DVFS table extracts the fields of all matched
+registers of a frequency block at once and exporting re-packs all edited registers
+of a block at once.
+
+NumPy is used when it is installed and the batch is large enough to amortize the
+conversion, otherwise the same arithmetic runs over the flat arrays in Python.
+Both paths return plain Python ints.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of fields below which the Python path is faster than converting to NumPy
+NUMPY_THRESHOLD = 2048
+
+
+class Field_Layout:
+    ''' Precomputed (mask, shift, width, signed) of every field of a register, in field order
+
+        self.names:         tuple of field names
+        self.masks:         tuple of field bitmasks in register value
+        self.shifts:        tuple of field lsb locations
+        self.widths:        tuple of number of bits of each field
+        self.signed:        whether field values are in two's complement
+        self.write_mask:    bitmask of register bits that can be written
+    '''
+    __slots__ = ('names', 'masks', 'shifts', 'widths', 'signed', 'write_mask')
+
+    def __init__(self, register_spec, signed = False):
+        fields = register_spec.fields
+        self.names = tuple(field.name for field in fields)
+        self.masks = tuple(field.field for field in fields)
+        self.shifts = tuple(field.lsb for field in fields)
+        self.widths = tuple(field.size for field in fields)
+        self.signed = signed
+        self.write_mask = register_spec.write_mask
+
+    def __len__(self):
+        return len(self.names)
+
+
+# Field_Layout by Register_Spec and signedness, specs are kept alive by their catalog
+layouts = dict()
+
+
+def layout(register_spec, signed = False):
+    ''' Returns the cached Field_Layout of a Register_Spec
+    '''
+    try:
+        return layouts[register_spec, signed]
+    except KeyError:
+        field_layout = Field_Layout(register_spec, signed)
+        layouts[register_spec, signed] = field_layout
+        return field_layout
+
+
+def extract_fields(values, field_layouts):
+    ''' Returns list with a list of field values for each register, two's complement fields
+        as their bits
+        Parameters:
+            values:         list of register values as int
+            field_layouts:  list of Field_Layout, one for each register
+    '''
+    counts = [len(field_layout) for field_layout in field_layouts]
+    total = sum(counts)
+    masks = [mask for field_layout in field_layouts for mask in field_layout.masks]
+    shifts = [shift for field_layout in field_layouts for shift in field_layout.shifts]
+    if np is not None and total >= NUMPY_THRESHOLD:
+        repeated = np.repeat(np.asarray(values, dtype = np.int64), counts)
+        flat = ((repeated & np.asarray(masks, dtype = np.int64)) >> np.asarray(shifts, dtype = np.int64)).tolist()
+    else:
+        repeated = [value for value, count in zip(values, counts) for times in range(count)]
+        flat = [(value & mask) >> shift for value, mask, shift in zip(repeated, masks, shifts)]
+    fields = list()
+    position = 0
+    for count in counts:
+        fields.append(flat[position:position + count])
+        position += count
+    return fields
+
+
+def pack_registers(values, fields, shifts, keep_masks):
+    ''' Returns list of register values with their fields replaced by the edited field values
+        Parameters:
+            values:     list of original register values as int
+            fields:     list with a sequence of field values for each register
+            shifts:     list with a sequence of field lsb locations for each register
+            keep_masks: list of bitmasks of each register's bits that should not be changed
+    '''
+    counts = [len(register_fields) for register_fields in fields]
+    total = sum(counts)
+    if np is not None and total >= NUMPY_THRESHOLD and all(counts):
+        flat_fields = np.fromiter((field for register_fields in fields for field in register_fields), dtype = np.int64, count = total)
+        flat_shifts = np.fromiter((shift for register_shifts in shifts for shift in register_shifts), dtype = np.int64, count = total)
+        starts = np.cumsum([0] + counts[:-1])
+        complete = np.bitwise_or.reduceat(flat_fields << flat_shifts, starts)
+        keep = np.asarray(keep_masks, dtype = np.int64)
+        packed = (np.asarray(values, dtype = np.int64) & keep) | (complete & ~keep & 0xFFFFFFFF)
+        return packed.tolist()
+    packed = list()
+    for value, register_fields, register_shifts, keep in zip(values, fields, shifts, keep_masks):
+        complete = 0
+        for field, shift in zip(register_fields, register_shifts):
+            complete |= field << shift
+        packed.append((value & keep) | (complete & (0xFFFFFFFF - keep)))
+    return packed
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Atomic writes of exported files
+
+Description:
+Exported files are written to a temporary file in the destination directory through
+a large buffer, flushed to disk, and moved over the destination with os.replace when
+complete. The data is written once, no copy crosses file systems, and an interrupted
+or failed export never leaves a partially written file, so overwriting the input
+files is safe.
+
+With a Content_Store, files are instead built in memory and named by the sha256 of their
+contents, a file identical to one already in the store is not written again but hard
+linked to the stored copy, so the many identical variants of a sweep take the disk
+space and write time of one.
+"""
+import hashlib
+import io
+import os
+import shutil
+import threading
+
+# Buffer size of exported files
+BUFFER_SIZE = 1 << 20
+
+
+class Output_File:
+    ''' File written through a temporary file beside its destination, which replaces the
+        destination when committed, used as a context manager it is committed on success
+        and discarded on error
+
+        self.path:      destination path
+        self.mode:      mode the file is written in
+        self.store:     Content_Store the file is deduplicated through, None if not deduplicated
+        self.temporary: path of temporary file being written
+        self.buffer:    in-memory bytes of the file if deduplicated, otherwise None
+        self.file:      file object of temporary file, or of buffer if deduplicated, encoding text
+                        as a file opened in mode would, None once committed or discarded
+    '''
+    def __init__(self, path, mode = 'wb', store = None):
+        self.path = path
+        self.mode = mode
+        self.store = store
+        # unique to the writing thread, so concurrent exports of the same path do not collide
+        self.temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if store is not None:
+            self.buffer = io.BytesIO()
+            self.file = self.buffer if 'b' in mode else io.TextIOWrapper(self.buffer)
+        else:
+            self.buffer = None
+            self.file = open(self.temporary, mode, buffering = BUFFER_SIZE)
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def writelines(self, lines):
+        self.file.writelines(lines)
+
+    def commit(self):
+        ''' Flushes the temporary file to disk and moves it over the destination, keeping the
+            permissions of the destination when it is overwritten
+        '''
+        if self.file is None:
+            return
+        if self.store is not None:
+            self.file.flush()
+            contents = self.buffer.getvalue()
+            self.file.close()
+            self.file = None
+            self.store.put(contents, self.path)
+            return
+        try:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+            self.file = None
+        try:
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, self.temporary)
+            os.replace(self.temporary, self.path)
+        except OSError:
+            self.remove()
+            raise
+
+    def discard(self):
+        ''' Removes the temporary file, leaving the destination untouched
+        '''
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if self.store is None:
+            self.remove()
+
+    def remove(self):
+        remove(self.temporary)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+class Content_Store:
+    ''' Directory of files named by the sha256 hex digest of their contents, shared by the
+        processes and threads writing through it
+        Stored files are hard linked to their destinations, so they must only be replaced,
+        as Output_File does, never edited in place
+
+        self.path:      path to store directory
+        self.digests:   dict with destination path as key and digest of its contents as value,
+                        for the files put by this process
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.digests = dict()
+        os.makedirs(path, exist_ok = True)
+
+    def put(self, contents, path):
+        ''' Writes contents to path through the store, only writing them to disk if no
+            identical file is stored yet
+            Returns digest of contents
+            Parameters:
+                contents:   bytes of file
+                path:       destination path
+        '''
+        digest = hashlib.sha256(contents).hexdigest()
+        stored = os.path.join(self.path, digest)
+        if not os.path.exists(stored):
+            temporary = f"{stored}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temporary, 'wb', buffering = BUFFER_SIZE) as stored_file:
+                    stored_file.write(contents)
+                # identical contents, so a concurrent writer of the same digest can be replaced
+                os.replace(temporary, stored)
+            except OSError:
+                remove(temporary)
+                raise
+        # rename does nothing when both names are links of the same file
+        if os.path.exists(path) and os.path.samefile(stored, path):
+            self.digests[path] = digest
+            return digest
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                os.link(stored, temporary)
+            except OSError:
+                # file system without hard links, keep a copy instead
+                shutil.copyfile(stored, temporary)
+            os.replace(temporary, path)
+        except OSError:
+            remove(temporary)
+            raise
+        self.digests[path] = digest
+        return digest
+
+    def prune(self):
+        ''' Removes the stored files no longer linked to any destination
+        '''
+        for name in os.listdir(self.path):
+            stored = os.path.join(self.path, name)
+            try:
+                if os.stat(stored).st_nlink == 1:
+                    os.remove(stored)
+            except OSError:
+                pass
+
+
+def remove(path):
+    ''' Removes a file if it exists
+    '''
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of partitioned DVFS table frequency blocks
+
+Description:
+Reloading an unchanged DVFS table re-runs the parse and bit partition of every
+frequency. This module stores the partition of each frequency block, as returned by
+partition_frequency, in a per-user cache directory keyed by the hash of the table's
+contents and the version of the config module it was partitioned with, so a repeat
+load of the same table only unmarshals the stored entries.
+
+Layout of cache directory:
+    <table digest>/<version>/<khz>  partition of a single frequency block
+The location can be moved with the DVFS_EDIT_CACHE environment variable.
+"""
+import marshal
+import os
+import sys
+
+# Bumped whenever the layout of a cached partition changes
+PARTITION_VERSION = 1
+CACHE_ENVIRONMENT = "DVFS_EDIT_CACHE"
+
+
+def cache_root():
+    ''' Returns the per-user directory the partition cache is stored in
+    '''
+    if os.environ.get(CACHE_ENVIRONMENT):
+        return os.environ[CACHE_ENVIRONMENT]
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dvfs_edit")
+
+
+class Partition_Cache:
+    ''' Cached partitions of the frequency blocks of a single DVFS table
+
+        self.directory: directory of the table's entries in cache
+        self.version:   version of config module the table is partitioned with, None until
+                        the processor is known (entries are not cached without a version)
+    '''
+    def __init__(self, digest, root=None):
+        self.directory = os.path.join(root or cache_root(), digest)
+        self.version = None
+
+    def set_version(self, config_version):
+        ''' Sets config module version entries are keyed by, None disables the cache
+        '''
+        self.version = None if config_version is None else f"{config_version}-{PARTITION_VERSION}"
+
+    def get(self, frequency):
+        ''' Returns cached partition of frequency, or None if missing or unreadable
+        '''
+        if self.version is None:
+            return None
+        return read_entry(os.path.join(self.directory, self.version, frequency))
+
+    def put(self, frequency, partition):
+        if self.version is not None:
+            write_entry(os.path.join(self.directory, self.version, frequency), partition)
+
+
+def read_entry(path):
+    try:
+        with open(path, 'rb') as entry:
+            return marshal.load(entry)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def write_entry(path, value):
+    ''' Writes entry through a temporary file, skipped silently if the cache is not writable
+    '''
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, 'wb') as entry:
+            marshal.dump(value, entry)
+        os.replace(temporary, path)
+    except (OSError, ValueError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
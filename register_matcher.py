@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass classification of DVFS register names against registers_to_display
+
+Description:
+Every pattern of a config's registers_to_display is merged into one compiled
+alternation, so each register name of a frequency is matched once instead of once
+per pattern. The aremc name, cfg name and channel group are expanded from the match
+of the pattern that claimed the name. When patterns overlap, the first entry of
+registers_to_display that matches a name wins.
+"""
+import re
+
+# Capturing groups inside a pattern, rewritten as non-capturing in the alternation
+NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+PLAIN_GROUP = re.compile(r"(?<!\\)\((?!\?)")
+
+
+def non_capturing(pattern):
+    ''' Returns pattern with all of its groups made non-capturing
+    '''
+    return PLAIN_GROUP.sub("(?:", NAMED_GROUP.sub("(?:", pattern))
+
+
+def strip_register(register):
+    ''' Returns DVFS register name without the info appended after it
+    '''
+    register = register.split("-", 1)[0]
+    register = register.split(";", 1)[0]
+    return register.rstrip("; ")
+
+
+class Register_Matcher:
+    ''' Matches DVFS register names against all registers_to_display entries at once
+
+        self.entries:   list of tuples of compiled pattern, aremc name, cfg name, axis, and
+                        two's complement flag in the order of registers_to_display
+        self.combined:  alternation of every pattern, each wrapped in a group named _<index>
+    '''
+    def __init__(self, registers_to_display):
+        self.entries = [(re.compile(register), aremc_name, cfg_name, axis, two)
+                        for register, aremc_name, cfg_name, axis, two in registers_to_display]
+        self.combined = re.compile("|".join(f"(?P<_{index}>{non_capturing(register)})"
+                                            for index, (register, *_) in enumerate(registers_to_display)))
+
+    def classify(self, dictionary):
+        ''' Returns list with a list of matched registers for each registers_to_display entry
+            Matched registers are tuples of DVFS register name, register value, aremc name,
+            cfg name, and channel, kept in the order of the dictionary
+            Parameters:
+                dictionary: Dictionary of registers and their values for a single frequency
+        '''
+        matches = [list() for entry in self.entries]
+        combined = self.combined.match
+        for register, value in dictionary.items():
+            found = combined(register)
+            if found is None:
+                continue
+            index = int(found.lastgroup[1:])
+            matched = self.expand(index, register, value)
+            if matched is not None:
+                matches[index].append(matched)
+        return matches
+
+    def expand(self, index, register, value):
+        ''' Returns tuple of matched register, or None if its stripped name no longer matches
+        '''
+        pattern, aremc_name, cfg_name, axis, two = self.entries[index]
+        specific_register = strip_register(register)
+        match = pattern.match(specific_register)
+        if match is None:
+            return None
+        rest = specific_register[match.end():]
+        if rest:
+            register_name = match.expand(aremc_name) + pattern.sub(aremc_name, rest)
+            cfg = match.expand(cfg_name) + pattern.sub(cfg_name, rest)
+        else:
+            register_name = match.expand(aremc_name)
+            cfg = match.expand(cfg_name)
+        channel = match.groupdict().get('CH', "")
+        return specific_register, value, register_name, cfg, channel
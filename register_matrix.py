@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar NumPy store of the register values of a DVFS table across frequencies
+
+Description:
+Holds register values as a frequencies x registers uint32 matrix with a register to
+column index, so a field can be extracted from and inserted into many registers of all
+frequencies at once with the aremc field masks and lsb shifts, instead of a Python loop
+per frequency and register. DVFS_Table.step_frequencies steps an axis of every
+frequency of a recipe through it.
+
+NumPy is an optional dependency, Register_Matrix raises ImportError without it.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Register_Matrix:
+    ''' Register values of a DVFS table with a row per frequency and a column per register
+
+        self.frequencies:   list of frequencies in row order
+        self.registers:     list of registers in column order
+        self.columns:       dict with register as key, and column index as value
+        self.values:        uint32 array of register values, zero where register is absent
+        self.present:       boolean array of whether the register exists in the frequency
+    '''
+    def __init__(self, frequencies, rows):
+        ''' Parameters:
+                frequencies:    list of frequencies in row order
+                rows:           list with a dict for each frequency, with register as key and
+                                register value as int as value, registers can be any hashable
+        '''
+        if np is None:
+            raise ImportError("numpy is required for Register_Matrix")
+        self.frequencies = list(frequencies)
+        self.columns = dict()
+        for row in rows:
+            for register in row:
+                self.columns.setdefault(register, len(self.columns))
+        self.registers = list(self.columns)
+        self.values = np.zeros((len(rows), len(self.columns)), dtype = np.uint32)
+        self.present = np.zeros((len(rows), len(self.columns)), dtype = bool)
+        for number, row in enumerate(rows):
+            columns = [self.columns[register] for register in row]
+            self.values[number, columns] = list(row.values())
+            self.present[number, columns] = True
+
+    def select(self, registers):
+        ''' Returns array of column indices of registers
+        '''
+        return np.fromiter((self.columns[register] for register in registers), dtype = np.intp, count = len(registers))
+
+    def extract(self, registers, mask, lsb):
+        ''' Returns frequencies x registers uint32 array of the field values of registers
+            Parameters:
+                registers:  list of registers
+                mask:       aremc field bitmask, or array of one bitmask per register
+                lsb:        aremc field lsb, or array of one lsb per register
+        '''
+        values = self.values[:, self.select(registers)]
+        return (values & np.asarray(mask, dtype = np.uint32)) >> np.asarray(lsb, dtype = np.uint32)
+
+    def insert(self, registers, mask, lsb, fields):
+        ''' Replaces the field of registers with field values, bits outside of the mask are kept
+            Parameters:
+                fields: field values broadcastable to frequencies x registers
+        '''
+        columns = self.select(registers)
+        mask = np.asarray(mask, dtype = np.uint32)
+        fields = (np.asarray(fields).astype(np.uint32) << np.asarray(lsb, dtype = np.uint32)) & mask
+        self.values[:, columns] = (self.values[:, columns] & ~mask) | fields
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Compact register and field metadata built from the aremc spec dicts
+
+Description:
+Every field of an aremc register is a dict of about ten keys, and the partitioning
+of a DVFS table looks up the same few keys per field for every frequency. This module
+converts a register's dict into an immutable Register_Spec holding a tuple of
+Field_Spec objects, which use __slots__ so field metadata is read with attribute
+loads. Action strings are interned and fields without enums share one empty mapping.
+"""
+import sys
+from types import MappingProxyType
+
+# Shared by every field that does not define enums
+EMPTY_ENUMS = MappingProxyType({})
+
+
+class Frozen_Slots:
+    ''' Base class for slotted objects whose attributes are only set when constructed
+    '''
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if name != 'fields' and not name.startswith('_'))
+        return f"{type(self).__name__}({values})"
+
+
+class Field_Spec(Frozen_Slots):
+    ''' Stores aremc information of a single field
+        name:       field name
+        lsb:        location of lsb in register value
+        msb:        location of msb in register value
+        size:       number of bits of field
+        field:      bitmask of field in register value
+        action:     access type of field (e.g. rw, ro)
+        enums:      read-only mapping of enum name to value
+    '''
+    __slots__ = ('name', 'lsb', 'msb', 'size', 'field', 'woffset', 'default', 'sw_default',
+                 'parity_protection', 'action', 'init_enum', 'enums')
+
+    def __init__(self, name, spec):
+        enums = spec.get('enums')
+        init_enum = spec.get('init_enum')
+        values = {
+            'name': name,
+            'lsb': spec['lsb'],
+            'msb': spec['msb'],
+            'size': spec['size'],
+            'field': spec['field'],
+            'woffset': spec.get('woffset', 0),
+            'default': spec.get('default', 0),
+            'sw_default': spec.get('sw_default', 0),
+            'parity_protection': spec.get('parity_protection', 0),
+            'action': sys.intern(spec['action']) if 'action' in spec else None,
+            'init_enum': sys.intern(init_enum) if init_enum is not None else None,
+            'enums': MappingProxyType(dict(enums)) if enums else EMPTY_ENUMS,
+        }
+        for slot, value in values.items():
+            object.__setattr__(self, slot, value)
+
+
+class Register_Spec(Frozen_Slots):
+    ''' Stores aremc information of a single register
+        name:           register name in aremc file
+        write_mask:     bitmask of bits that can be written
+        fields:         tuple of Field_Spec in order of field_list
+    '''
+    __slots__ = ('name', 'addr', 'size', 'reset_val', 'reset_mask', 'read_mask', 'write_mask',
+                 'fields', '_by_name')
+
+    def __init__(self, name, spec):
+        fields = tuple(Field_Spec(field, spec[field]) for field in spec['field_list'])
+        values = {
+            'name': name,
+            'addr': spec.get('addr', 0),
+            'size': spec.get('size', 0),
+            'reset_val': spec.get('reset_val', 0),
+            'reset_mask': spec.get('reset_mask', 0),
+            'read_mask': spec.get('read_mask', 0),
+            'write_mask': spec['write_mask'],
+            'fields': fields,
+            '_by_name': {field.name: field for field in fields},
+        }
+        for slot, value in values.items():
+            object.__setattr__(self, slot, value)
+
+    def __getitem__(self, field):
+        return self._by_name[field]
+
+    def __contains__(self, field):
+        return field in self._by_name
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+
+class Spec_Catalog:
+    ''' Builds Register_Spec objects on first lookup from an aremc registers dict
+
+        self.registers: aremc registers dict with address space as first key
+        self.specs:     dict with tuple of address space and register name as key,
+                        and Register_Spec as value
+    '''
+    def __init__(self, registers):
+        self.registers = registers
+        self.specs = dict()
+
+    def get(self, space, name):
+        ''' Returns Register_Spec of register, raising KeyError if not in aremc
+        '''
+        try:
+            return self.specs[space, name]
+        except KeyError:
+            table = self.registers[space]
+            # lazily loaded tables hand back a dict that is not kept once converted
+            unmarshal = getattr(table, 'unmarshal', None)
+            spec = unmarshal(name) if unmarshal is not None else table[name]
+            register = Register_Spec(name, spec)
+            self.specs[space, name] = register
+            return register
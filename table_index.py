@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Index of the frequency blocks of a DVFS table text file
+
+Description:
+Records the byte offset range of every SDRAM frequency block in a DVFS table so
+a single frequency can be read by seeking to it and the blocks left untouched by
+an export can be copied verbatim. The index is built by scanning the table once
+and cached beside it, keyed on the hash of the table's contents.
+
+A block starts right after the PLLHUB_ENABLE_FREQ_CHANGE line of the previous block
+(the first block starts at the beginning of the file) and ends after its own
+PLLHUB_ENABLE_FREQ_CHANGE line, matching the blocks yielded by parse_blocks.
+
+The byte offset range of the hex value of every editable register in a block, those
+matched by the registers_to_display patterns of the table's config, is recorded with it,
+so an export writes the new values over those ranges of the original table and copies
+every other byte unchanged, without splitting lines. The index is keyed on the patterns
+as well, so a changed config indexes the table again.
+"""
+import hashlib
+import io
+import json
+import os
+
+# Bumped whenever the layout of the index file changes
+INDEX_VERSION = 3
+# Register which marks the end of a frequency block, and register holding its frequency
+END_REGISTER = b"PLLHUB_ENABLE_FREQ_CHANGE"
+FREQUENCY_REGISTER = b"SDRAM frequency khz"
+# Tables are plain ASCII, latin-1 keeps every byte as a single character
+ENCODING = "latin-1"
+
+
+class Table_Index:
+    ''' Byte offset ranges of the frequency blocks of a DVFS table
+
+        self.path:      path to DVFS table text file
+        self.digest:    sha256 hex digest of the table's contents
+        self.size:      size of the table in bytes
+        self.blocks:    list of tuples of frequency, start offset, and end offset in file order
+        self.values:    list with a dict for each block, with editable register name as key and
+                        list of start and end offsets of its hex values in the table as value
+    '''
+    def __init__(self, path, digest, size, blocks, values):
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.blocks = blocks
+        self.values = values
+
+    def frequencies(self):
+        ''' Returns list of frequencies in file order
+        '''
+        return [frequency for frequency, start, end in self.blocks]
+
+    def block(self, frequency):
+        ''' Returns tuple of start and end offset of frequency, the last block if repeated
+        '''
+        for block_frequency, start, end in reversed(self.blocks):
+            if block_frequency == frequency:
+                return start, end
+        raise KeyError(frequency)
+
+    def read(self, frequency):
+        ''' Returns contents of the block of frequency as text with universal newlines
+        '''
+        start, end = self.block(frequency)
+        return read_block(self.path, start, end)
+
+
+def read_block(path, start, end):
+    ''' Returns contents between byte offsets of DVFS table as text with universal newlines
+    '''
+    with open(path, 'rb') as table:
+        table.seek(start)
+        contents = table.read(end - start)
+    return io.StringIO(contents.decode(ENCODING), newline=None)
+
+
+def load_index(path, registers = None):
+    ''' Returns Table_Index of DVFS table, from the cached index beside it when valid
+        Parameters:
+            registers:  compiled pattern matching the registers whose values are recorded,
+                        e.g. display_matcher.combined of the config, None for every register
+    '''
+    with open(path, 'rb') as table:
+        contents = table.read()
+    digest = hashlib.sha256(contents).hexdigest()
+    key = None if registers is None else hashlib.sha256(registers.pattern.encode()).hexdigest()
+    cache_path = index_file(path)
+    index = read_index(cache_path, digest, key)
+    if index is None:
+        index = scan_blocks(contents, registers)
+        write_index(cache_path, digest, key, *index)
+    return Table_Index(path, digest, len(contents), *index)
+
+
+def scan_blocks(contents, registers = None):
+    ''' Returns tuple of list of tuples of frequency, start offset, and end offset of each
+        block, and list of the offsets of the register values of each block, see Table_Index
+        Every value int(value, 16) accepts is recorded, with or without 0x prefix
+        Parameters:
+            contents:   bytes of DVFS table
+            registers:  see load_index
+    '''
+    blocks = list()
+    values = list()
+    block_values = dict()
+    start = 0
+    offset = 0
+    frequency = None
+    for line in contents.splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+        line_list = line.split(b',')
+        if len(line_list) > 1:
+            register = line_list[1]
+            if not register.isspace():
+                register = register.strip(b'/* \r\n')
+                if registers is None or registers.match(register.decode(ENCODING)):
+                    value = line_list[0].lstrip()
+                    value_start = line_start + len(line_list[0]) - len(value)
+                    value = value.rstrip()
+                    try:
+                        int(value, 16)
+                    except ValueError:
+                        pass
+                    else:
+                        block_values.setdefault(register_name(register), list()).append((value_start, value_start + len(value)))
+                if register == FREQUENCY_REGISTER:
+                    frequency = line_list[0].lstrip().decode(ENCODING)
+                elif register == END_REGISTER and frequency is not None:
+                    blocks.append((frequency, start, offset))
+                    values.append(block_values)
+                    block_values = dict()
+                    start = offset
+                    frequency = None
+    return blocks, values
+
+
+def register_name(register):
+    ''' Returns DVFS register name of the comment of a table line without appended info
+        Parameters:
+            register: bytes of comment stripped of comment markers
+    '''
+    register = register.split(b"-", 1)[0]
+    register = register.split(b";", 1)[0]
+    return register.rstrip(b"; ").decode(ENCODING)
+
+
+def index_file(path):
+    ''' Returns the path of the index file kept beside the DVFS table
+    '''
+    directory, name = os.path.split(path)
+    return os.path.join(directory, "." + name + ".idx")
+
+
+def read_index(cache_path, digest, key):
+    ''' Returns cached tuple of blocks and values, or None if the index is missing or stale
+        Parameters:
+            key: sha256 hex digest of the pattern of the registers indexed, None for every register
+    '''
+    try:
+        with open(cache_path, 'rt') as cache:
+            index = json.load(cache)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION or index.get('digest') != digest or index.get('registers') != key:
+        return None
+    return [tuple(block) for block in index['blocks']], index['values']
+
+
+def write_index(cache_path, digest, key, blocks, values):
+    ''' Writes index beside the DVFS table, skipped silently if the location is read-only
+    '''
+    try:
+        with open(cache_path, 'wt') as cache:
+            json.dump({'version': INDEX_VERSION, 'digest': digest, 'registers': key, 'blocks': blocks, 'values': values}, cache)
+    except OSError:
+        pass